@@ -43,6 +43,8 @@ class Info:
     self.__timeout = 1800
     self.__timescale = 0.01
     self.__max_socket_buffer_size = 10000
+    # Directory to cache the computed feature tables. If None, tables are only shared in memory.
+    self.__table_cache_dir = os.environ.get("EXKALDIRT_TABLE_CACHE_DIR",None)
     # Check Kaldi root directory and ExKaldi-RT tool directory
     self.__find_ctool_root()
     # Get the float floor
@@ -126,6 +128,11 @@ class Info:
   def MAX_SOCKET_BUFFER_SIZE(self):
     return self.__max_socket_buffer_size
 
+  @property
+  def TABLE_CACHE_DIR(self):
+    '''Directory to cache the feature tables such as Mel filters bank and DCT matrix. None means no disk cache.'''
+    return self.__table_cache_dir
+
   def set_MAX_SOCKET_BUFFER_SIZE(self,size:int):
     assert isinstance(size,int) and size > 4
     self.__max_socket_buffer_size = size
@@ -138,6 +145,10 @@ class Info:
     assert isinstance(value,float) and 0 < value < 1.0, "TIMESCALE should be a float value in (0,1)."
     self.__timescale = value
 
+  def set_TABLE_CACHE_DIR(self,value):
+    assert value is None or isinstance(value,str), "TABLE_CACHE_DIR should be None or a directory path."
+    self.__table_cache_dir = value
+
 # Instantiate this object.
 info = Info()
 
@@ -254,25 +265,26 @@ class Packet:
     '''
     Encode packet.
     '''
-    result = b""
+    # Collect the pieces and join them once, so the encoded data is not copied again for each record
+    result = []
     
     #Encode class name
-    result += ( self.__class__.__name__.encode() + b" " )
+    result.append( self.__class__.__name__.encode() + b" " )
 
     # Encode idmaker and fid
-    result += uint_to_bytes(self.idmaker, length=4)
-    result += uint_to_bytes(self.cid, length=4)
+    result.append( uint_to_bytes(self.idmaker, length=4) )
+    result.append( uint_to_bytes(self.cid, length=4) )
 
     # If this is not an empty packet
     if self.mainKey is not None:
 
       # Encode main key
-      result += (self.mainKey.encode() + b" ")
+      result.append( self.mainKey.encode() + b" " )
       
       # Encode data
       for key,value in self.__data.items():
         # Encode key
-        result += key.encode() + b" "
+        result.append( key.encode() + b" " )
         if isinstance( value,(np.signedinteger,np.floating) ):
           bvalue = element_to_bytes( value )
           flag = b"E"
@@ -288,16 +300,25 @@ class Packet:
           flag = b"S"
         else:
           raise Exception("Unsupported data type.")
-        result += ( flag + uint_to_bytes( len(bvalue),length=4 ) + bvalue )
+        result.append( flag + uint_to_bytes( len(bvalue),length=4 ) )
+        result.append( bvalue )
   
-    return result
+    return b"".join(result)
 
   @classmethod
   def decode(cls,bstr):
     '''
     Generate a packet object.
     '''
+    # Arrays are decoded from views of the message without copying the bytes firstly,
+    # the Packet will take its own copy of them
+    view = memoryview(bstr)
     with BytesIO(bstr) as sp:
+
+      def read_view(size):
+        start = sp.tell()
+        sp.seek(size,1)
+        return view[start:start+size]
       
       # Read class name
       className = read_string( sp )
@@ -322,10 +343,10 @@ class Packet:
             data = element_from_bytes( sp.read(size) )
           elif flag == "V":
             size = uint_from_bytes( sp.read(4) )
-            data = vector_from_bytes( sp.read(size) )
+            data = vector_from_bytes( read_view(size) )
           elif flag == "M":
             size = uint_from_bytes( sp.read(4) )
-            data = matrix_from_bytes( sp.read(size) )
+            data = matrix_from_bytes( read_view(size) )
           elif flag == "S":
             size = uint_from_bytes( sp.read(4) )
             data = sp.read(size).decode()
@@ -447,6 +468,9 @@ class PIPE(ExKaldiRTBase):
     assert m in mark.values()
     self.__state = m
     self.__time_stamp = time.time()
+    # Wake up the components waiting in .wait method, so they see the new state at once
+    with self.__cache.not_empty:
+      self.__cache.not_empty.notify_all()
 
   @property
   def state(self):
@@ -576,7 +600,9 @@ class PIPE(ExKaldiRTBase):
     '''
     Get the size.
     '''
-    return self.__cache.qsize()
+    # Each PIPE has one producer and one consumer. The length of the underlying deque can be read without
+    # taking the queue mutex, which the producer and the consumer would otherwise contend for at every poll.
+    return len(self.__cache.queue)
 
   def is_empty(self)->bool:
     '''
@@ -584,6 +610,16 @@ class PIPE(ExKaldiRTBase):
     '''
     return self.size() == 0
 
+  def wait(self,timeout=info.TIMESCALE)->bool:
+    '''
+    Block until a packet is appended or timeout, instead of sleeping for a fixed time.
+    If there is any data in PIPE, return True.
+    '''
+    with self.__cache.not_empty:
+      if len(self.__cache.queue) == 0:
+        self.__cache.not_empty.wait(timeout)
+      return len(self.__cache.queue) > 0
+
   def get(self,password=None,timeout=info.TIMEOUT)->Packet:
     '''
     Pop a packet from head.
@@ -612,6 +648,40 @@ class PIPE(ExKaldiRTBase):
     # Return
     self.__cacheSize -= 1
     return packet
+
+  def get_batch(self,n,password=None)->list:
+    '''
+    Pop at most n packets from head under one lock.
+    We will stop after the first Endpoint so that packets of the next segment are kept in PIPE.
+    Return an empty list if no packet is avaliable.
+    '''
+    assert isinstance(n,int) and n > 0, f"{self.name}: <n> should be a positive int value."
+    if self.state_is_(mark.silent,mark.stranded):
+      print_( f"Warning, {self.name}: Failed to get packet in PIPE. PIPE state is or silent or stranded." )
+      return []
+    # If PIPE is active and output port is locked
+    if self.state_is_(mark.active) and self.is_outlocked():
+      if password is None:
+        raise Exception(f"{self.name}: Output of PIPE is clocked. Unlock or give the password to access it.")
+      elif password != self.__password:
+        raise Exception(f"{self.name}: Wrong password to access the PIPE.")
+
+    packets = []
+    with self.__cache.mutex:
+      while len(packets) < n and len(self.__cache.queue) > 0:
+        packet = self.__cache.queue.popleft()
+        packets.append( packet )
+        if is_endpoint(packet):
+          break
+      self.__cache.not_full.notify()
+
+    if len(packets) > 0:
+      # Record time stamp
+      if self.__firstGet == 0.0:
+        self.__firstGet = datetime.datetime.now()
+      self.__lastGet = datetime.datetime.now()
+      self.__cacheSize -= len(packets)
+    return packets
   
   def put(self,packet,password=None):
     '''
@@ -659,6 +729,66 @@ class PIPE(ExKaldiRTBase):
         func(packet)
     
     return True
+
+  def put_batch(self,packets,password=None):
+    '''
+    Push a list of packets to tail under one lock.
+    The rules are the same as .put method.
+    '''
+    if self.state_is_(mark.wrong,mark.terminated,mark.stranded):
+      print_( f"{self.name}: Failed to put packet in PIPE. PIPE state is not active or silent." )
+      return False
+
+    # If input port is locked
+    if self.is_inlocked():
+      if password is None:
+        raise Exception(f"{self.name}: Input of PIPE is clocked. Unlock or give the password to access it.")
+      elif password != self.__password:
+        raise Exception(f"{self.name}: Wrong password to access the PIPE.")
+
+    if len(packets) == 0:
+      return True
+
+    # check all packets firstly, so that a wrong one does not leave the PIPE state or endpoint flag half updated
+    for packet in packets:
+      assert isinstance(packet,Packet), f"{self.name}: Only Packet can be appended in PIPE."
+
+    if self.state_is_(mark.silent):
+      self.__shift_state_to_(mark.active)
+
+    # remove endpoint continuous flags
+    accepted = []
+    for packet in packets:
+      if is_endpoint(packet):
+        if not self.__last_added_endpoint:
+          accepted.append( packet )
+          self.__last_added_endpoint = True
+        elif not packet.is_empty():
+          print_("Warning: An endpoint Packet has been discarded, even though it is not empty.")
+      else:
+        accepted.append( packet )
+        self.__last_added_endpoint = False
+    
+    # record time stamp
+    if self.__firstPut == 0.0:
+      self.__firstPut = datetime.datetime.now()
+    self.__lastPut = datetime.datetime.now()
+
+    with self.__cache.mutex:
+      self.__cache.queue.extend( accepted )
+      self.__cache.unfinished_tasks += len(accepted)
+      self.__cache.not_empty.notify( len(accepted) )
+    self.__cacheSize += len(accepted)
+
+    if len(accepted) > 0:
+      self.__lastID = (accepted[-1].cid,accepted[-1].idmaker)
+    # call back
+    for packet in accepted:
+      if not is_endpoint(packet):
+        for func in self.__callbacks:
+          func(packet)
+
+    return True
   
   def to_list(self,mapFunc=None)->list:
     '''
@@ -730,11 +860,21 @@ class NullPIPE(PIPE):
   def is_empty(self)->bool:
     return True
 
+  def wait(self,timeout=info.TIMESCALE)->bool:
+    time.sleep(timeout)
+    return False
+
   def get(self,password=None,timeout=info.TIMEOUT)->Packet:
     raise Exception("Null PIPE can not return packet.")
+
+  def get_batch(self,n,password=None)->list:
+    raise Exception("Null PIPE can not return packet.")
   
   def put(self,packet,password=None):
     raise Exception("Null PIPE can not storage packet.")
+
+  def put_batch(self,packets,password=None):
+    raise Exception("Null PIPE can not storage packet.")
   
   def to_list(self,mapFunc=None)->list:
     raise Exception("Null PIPE can not convert to list.")
@@ -968,8 +1108,10 @@ class Component(ExKaldiRTBase):
       
       if state == mark.active:
         if self.inPIPE.is_empty():
-          time.sleep(info.TIMESCALE)
-          timecost += info.TIMESCALE
+          # wake up as soon as a new packet is appended
+          st = time.time()
+          self.inPIPE.wait(info.TIMESCALE)
+          timecost += time.time() - st
           if timecost > info.TIMEOUT:
             print(f"{self.name}: Timeout!")
             self.inPIPE.kill()
@@ -1065,9 +1207,19 @@ class Component(ExKaldiRTBase):
     assert self.__inPIPE is not None
     return self.__inPIPE.get(password=self.__inPassword)
 
+  def get_packets(self,n):
+    '''
+    Get at most n packets from input PIPE (stop after an Endpoint).
+    '''
+    assert self.__inPIPE is not None
+    return self.__inPIPE.get_batch(n,password=self.__inPassword)
+
   def put_packet(self,packet):
     self.__outPIPE.put(packet,password=self.__outPassword)
 
+  def put_packets(self,packets):
+    self.__outPIPE.put_batch(packets,password=self.__outPassword)
+
 class Chain(ExKaldiRTBase):
   '''
   Chain is a container to easily manage the sequential Component-PIPEs.
@@ -1625,8 +1777,10 @@ class Joint(ExKaldiRTBase):
 
       # If buffer has not been filled fully
       if None in buffer:
-        time.sleep( info.TIMESCALE )
-        timecost += info.TIMESCALE
+        # wake up as soon as a packet is appended into the (first) PIPE which is waited for
+        st = time.time()
+        self.__inPIPE_Pool[ buffer.index(None) ].wait(info.TIMESCALE)
+        timecost += time.time() - st
         ## If timeout, break loop and terminate
         if timecost > info.TIMEOUT:
           print(f"{self.name}: Timeout!")
@@ -1768,8 +1922,9 @@ def dynamic_display(pipe,mapFunc=None):
   while True:
     if pipe.state_is_(mark.active):
       if pipe.is_empty():
-        time.sleep( info.TIMESCALE )
-        timecost += info.TIMESCALE
+        st = time.time()
+        pipe.wait(info.TIMESCALE)
+        timecost += time.time() - st
         if timecost > info.TIMEOUT:
           raise Exception( f"{pipe.name}: Time out!" )
         continue
@@ -1832,6 +1987,11 @@ class ContextManager(ExKaldiRTBase):
     else:
       self.__width = self.__left + center
     self.__tail = self.__left + center + self.__right
+    # The buffer is used as a ring, so the history is not moved when a new batch arrived.
+    # These are the row indexes (relative to the head) to write the new batch and to read the wrapped frames.
+    self.__head = 0
+    self.__writeIndex = np.arange(self.__width - center, self.__width)
+    self.__readIndex = np.arange(0, self.__tail if self.__right > 0 else self.__width)
 
   def wrap(self, batch):
     '''
@@ -1845,22 +2005,17 @@ class ContextManager(ExKaldiRTBase):
       frames, dim = batch.shape
       self.__compute_size(frames)
       self.__buffer = np.zeros([self.__width,dim],dtype=batch.dtype)
+      self.__buffer[self.__writeIndex,:] = batch
       if self.__right == 0:
-        self.__buffer[self.__left:,:] = batch
         return self.__buffer.copy()
       else:
-        self.__buffer[-self.__center:,:] = batch
         return None
     else:
       assert len(batch) == self.__center
-      if self.__right == 0:
-        self.__buffer[0:self.__left,:] = self.__buffer[ self.__center: ]
-        self.__buffer[self.__left:,:] = batch
-        return self.__buffer.copy()
-      else:
-        self.__buffer[ 0:-self.__center,:] = self.__buffer[ self.__center:,: ]
-        self.__buffer[ -self.__center:,:] = batch
-        return self.__buffer[0:self.__tail,:].copy()
+      # Drop the oldest batch by moving the head forward
+      self.__head = (self.__head + self.__center) % self.__width
+      self.__buffer[(self.__head + self.__writeIndex) % self.__width,:] = batch
+      return np.take(self.__buffer, (self.__head + self.__readIndex) % self.__width, axis=0)
 
   def strip(self,batch):
     assert isinstance(batch,np.ndarray) and len(batch.shape) == 2
@@ -174,6 +174,37 @@ def test_pipe():
 
 #test_pipe()
 
+def test_pipe_get_batch():
+
+  pipe = base.PIPE()
+  for i in range(5):
+    pipe.put( base.Packet( items={"stream":i}, cid=i, idmaker=0 ) )
+  pipe.put( base.Endpoint( cid=5, idmaker=0 ) )
+  pipe.put( base.Packet( items={"stream":6}, cid=6, idmaker=0 ) )
+  pipe.stop()
+
+  # Several packets can be picked out under one lock.
+  # At most N packets will be returned and it stops after an endpoint.
+  print( len(pipe.get_batch(3)) ) # 3
+  print( len(pipe.get_batch(3)) ) # 3: two packets and the endpoint
+  print( len(pipe.get_batch(3)) ) # 2: one packet and the endpoint appended by .stop()
+
+#test_pipe_get_batch()
+
+def test_pipe_put_batch():
+
+  pipe = base.PIPE()
+  packets = [ base.Packet( items={"stream":i}, cid=i, idmaker=0 ) for i in range(5) ]
+  packets.append( base.Endpoint( cid=5, idmaker=0 ) )
+  packets.append( base.Endpoint( cid=6, idmaker=0 ) )
+
+  # Several packets can be appended under one lock.
+  # Continuous endpoints are removed like .put method.
+  pipe.put_batch( packets )
+  print( pipe.size() ) # 6
+
+#test_pipe_put_batch()
+
 def test_pipe_communication():
 
   def PF_func1(pipe):
@@ -25,12 +25,12 @@ import queue
 from exkaldirt.base import info, mark, is_endpoint, print_
 from exkaldirt.base import Component, PIPE, Packet, ContextManager, Endpoint
 from exkaldirt.utils import encode_vector_temp
-from exkaldirt.feature import apply_floor
+from exkaldirt.feature import apply_log_floor
 
 # from base import info, mark, is_endpoint, print_
 # from base import Component, PIPE, Packet, ContextManager, Endpoint
 # from utils import encode_vector_temp
-# from feature import apply_floor
+# from feature import apply_log_floor
 
 if info.CMDROOT is None:
   raise Exception("ExKaldi-RT C++ library have not been compiled sucessfully. " + \
@@ -178,8 +178,7 @@ class AcousticEstimator(Component):
       probs = softmax(probs,axis=1)
     ## Log
     if self.__applyLog:
-      probs = apply_floor(probs)
-      probs = np.log(probs)
+      probs = apply_log_floor(probs)
     ## Normalize with priors
     if self.__priors:
       assert probs.shape[-1] == len(self.__priors), "priors dimension does not match the output of acoustic function."
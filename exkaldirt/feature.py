@@ -23,17 +23,18 @@ import time
 import webrtcvad
 import threading
 import multiprocessing
+import mmap
+import hashlib
+import inspect
 import numpy as np
 import subprocess
 from collections import namedtuple
 
 from exkaldirt.base import ExKaldiRTBase, Component, PIPE, Packet, ContextManager
-from exkaldirt.utils import run_exkaldi_shell_command, encode_vector_temp
 from exkaldirt.base import info, mark, print_
 from exkaldirt.base import Endpoint, is_endpoint, NullPIPE
 
 # from base import ExKaldiRTBase, Component, PIPE, Packet, ContextManager
-# from utils import run_exkaldi_shell_command, encode_vector_temp
 # from base import info, mark, print_
 # from base import Endpoint, is_endpoint, NullPIPE
 
@@ -41,10 +42,6 @@ if info.CMDROOT is None:
 	raise Exception("ExKaldi-RT C++ library have not been compiled sucessfully. " + \
 									"Please consult the Installation in github: https://github.com/wangyu09/exkaldi-rt .")
 
-import sys
-sys.path.append( info.CMDROOT )
-import cutils
-
 ###############################################
 # 1. Some functions for feature extraction
 ###############################################
@@ -62,8 +59,11 @@ def pre_emphasize_1d(waveform,coeff=0.95):
 	'''
 	assert 0 <= coeff < 1.0
 	assert isinstance(waveform,np.ndarray) and  len(waveform.shape) == 1
-	new = np.zeros_like(waveform)
-	new[1:] = waveform[1:] - coeff*waveform[:-1]
+	# Write the shifted product straight into the result and add the signal in place,
+	# so neither a zero fill nor a temporary array is needed
+	new = np.empty_like(waveform)
+	np.multiply(waveform[:-1], -coeff, out=new[1:])
+	np.add(new[1:], waveform[1:], out=new[1:])
 	new[0] = waveform[0] - coeff*waveform[0]
 	return new
 
@@ -80,8 +80,11 @@ def pre_emphasize_2d(waveform,coeff=0.95):
 	'''
 	assert 0 <= coeff < 1.0
 	assert isinstance(waveform,np.ndarray) and  len(waveform.shape) == 2
-	new = np.zeros_like(waveform)
-	new[:,1:] = waveform[:,1:] - coeff*waveform[:,:-1]
+	# Write the shifted product straight into the result and add the signal in place,
+	# so neither a zero fill nor a temporary array is needed
+	new = np.empty_like(waveform)
+	np.multiply(waveform[:,:-1], -coeff, out=new[:,1:])
+	np.add(new[:,1:], waveform[:,1:], out=new[:,1:])
 	new[:,0] = waveform[:,0] - coeff*waveform[:,0]
 	return new
 
@@ -97,54 +100,63 @@ def get_window_function(size,winType="povey",blackmanCoeff=0.42):
 		A 1-d np.ndarray.
 	'''
 	assert isinstance(size,int) and size > 0
-	window = np.zeros([size,],dtype="float32")
 	a = 2*np.pi / (size-1)
-	for i in range(size):
-		if winType == "hanning":
-			window[i] = 0.5 - 0.5*np.cos(a*i)
-		elif winType == "sine":
-			window[i] = np.sin(0.5*a*i)
-		elif winType == "hamming":
-			window[i] = 0.54 - 0.46*np.cos(a*i)
-		elif winType == "povey":
-			window[i] = (0.5-0.5*np.cos(a*i))**0.85
-		elif winType == "rectangular":
-			winType[i] = 1.0
-		elif winType == "blackman":
-			assert isinstance(blackmanCoeff,float)
-			winType[i] = blackmanCoeff - 0.5*np.cos(a*i) + (0.5-blackmanCoeff)*np.cos(2*a*i)
-		else:
-			raise Exception(f"Unknown Window Type: {winType}")
+	# All windows are symmetric, so only compute the first half of them.
+	i = np.arange((size+1)//2)
+	if winType == "hanning":
+		window = 0.5 - 0.5*np.cos(a*i)
+	elif winType == "sine":
+		window = np.sin(0.5*a*i)
+	elif winType == "hamming":
+		window = 0.54 - 0.46*np.cos(a*i)
+	elif winType == "povey":
+		window = (0.5-0.5*np.cos(a*i))**0.85
+	elif winType == "rectangular":
+		window = np.ones([len(i),])
+	elif winType == "blackman":
+		assert isinstance(blackmanCoeff,float)
+		window = blackmanCoeff - 0.5*np.cos(a*i) + (0.5-blackmanCoeff)*np.cos(2*a*i)
+	else:
+		raise Exception(f"Unknown Window Type: {winType}")
 	
-	return window
+	window = np.concatenate([window, window[:size//2][::-1]])
+	return window.astype("float32")
 
-def dither_singal_1d(waveform,factor=1.0):
+def dither_singal_1d(waveform,factor=1.0,rng=None):
 	'''
 	Dither the signal.
 
 	Args:
 		_waveform_: (1-d np.ndarray) The waveform.
 		_factor_: (float) Dither factor.
+		_rng_: (np.random.Generator) The random generator. If None, create a new one.
 	
 	Return:
 		A new 1-d np.ndarray.
 	'''
 	assert isinstance(waveform,np.ndarray) and len(waveform.shape) == 1
-	return cutils.dither( waveform[None,:], factor)[0]
+	return dither_singal_2d(waveform[None,:], factor, rng)[0]
 
-def dither_singal_2d(waveform,factor=0.0):
+def dither_singal_2d(waveform,factor=0.0,rng=None):
 	'''
 	Dither the signal.
 
 	Args:
 		_waveform_: (2-d np.ndarray) A batch of waveforms.
 		_factor_: (float) Dither factor.
+		_rng_: (np.random.Generator) The random generator. If None, create a new one.
 	
 	Return:
 		A new 2-d np.ndarray.
 	'''
 	assert isinstance(waveform,np.ndarray) and len(waveform.shape) == 2
-	return cutils.dither(waveform, factor)
+	if rng is None:
+		rng = np.random.default_rng()
+	dtype = waveform.dtype if waveform.dtype in (np.float32,np.float64) else np.float64
+	# Add the waveform into the noise buffer, so only one new array is allocated
+	noise = rng.standard_normal(waveform.shape, dtype=dtype)
+	noise *= factor
+	return np.add(noise, waveform, out=noise)
 
 def remove_dc_offset_1d(waveform):
 	'''
@@ -159,18 +171,19 @@ def remove_dc_offset_1d(waveform):
 	assert isinstance(waveform,np.ndarray) and len(waveform.shape) == 1
 	return waveform - np.mean(waveform)
 
-def remove_dc_offset_2d(waveform):
+def remove_dc_offset_2d(waveform,out=None):
 	'''
 	Remove the direct current offset.
 
 	Args:
 		_waveform_: (2-d np.ndarray) A batch of waveforms.
+		_out_: (None or 2-d np.ndarray) If given, write the result into it. It can be the _waveform_ itself.
 	
 	Return:
-		A new 2-d np.ndarray.
+		A new 2-d np.ndarray, or the _out_ array.
 	'''
 	assert isinstance(waveform,np.ndarray) and len(waveform.shape) == 2
-	return waveform - np.mean(waveform,axis=1,keepdims=True)
+	return np.subtract(waveform,np.mean(waveform,axis=1,keepdims=True),out=out)
 
 def compute_log_energy_1d(waveform,floor=info.EPSILON):
 	'''
@@ -195,12 +208,33 @@ def compute_log_energy_2d(waveform,floor=info.EPSILON):
 		_floor_: (float) Float floor value. 
 	
 	Return:
-		A new 2-d np.ndarray.
+		A new 1-d np.ndarray.
 	'''
 	assert isinstance(waveform,np.ndarray) and len(waveform.shape) == 2
-	temp = np.sum(waveform**2,axis=1)
-	temp[temp < floor] = floor
-	return np.log(temp)
+	# row-wise dot product without the squared temporary
+	temp = np.einsum("ij,ij->i",waveform,waveform,optimize=False)
+	return apply_log_floor(temp,floor)
+
+def compute_log_energy_from_power_2d(powerSpectrum,floor=info.EPSILON):
+	'''
+	Compute log energy of the windowed waveforms from their power spectrum (Parseval's theorem).
+
+	Args:
+		_powerSpectrum_: (2-d np.ndarray) The power spectrum with shape (frames, fftLen/2+1).
+		_floor_: (float) Float floor value. 
+	
+	Return:
+		A new 1-d np.ndarray.
+	'''
+	assert isinstance(powerSpectrum,np.ndarray) and len(powerSpectrum.shape) == 2
+	half = powerSpectrum.shape[1] - 1
+	# The bins between DC and Nyquist appear twice in the full spectrum
+	temp = np.sum(powerSpectrum,axis=1)
+	temp *= 2
+	temp -= powerSpectrum[:,0]
+	temp -= powerSpectrum[:,half]
+	temp /= 2*half
+	return apply_log_floor(temp,floor)
 
 def split_radix_real_fft_1d(waveform):
 	'''
@@ -215,10 +249,8 @@ def split_radix_real_fft_1d(waveform):
 		_Result_: (A 2-d np.ndarray) The first dimension is real values, The second dimension is image values.
 	'''
 	assert isinstance(waveform,np.ndarray) and len(waveform.shape) == 1
-	points = len(waveform)
-	fftLen = get_padded_fft_length(points)
-	result = cutils.srfft(waveform[None,:],fftLen)[0]
-	return fftLen, result
+	fftLen, result = split_radix_real_fft_2d(waveform[None,:])
+	return fftLen, result[0]
 
 def split_radix_real_fft_2d(waveform):
 	'''
@@ -235,7 +267,15 @@ def split_radix_real_fft_2d(waveform):
 	assert isinstance(waveform,np.ndarray) and len(waveform.shape) == 2
 	points = waveform.shape[1]
 	fftLen = get_padded_fft_length(points)
-	result = cutils.srfft(waveform,fftLen)
+	# Compute real FFT in process (zero padded to FFT length)
+	spec = np.fft.rfft(waveform,n=fftLen,axis=1)
+	# Arrange the result in the same layout as Kaldi's split radix FFT:
+	# The first row packs the DC and Nyquist values, the others are (real, image) pairs.
+	result = np.empty([len(waveform),fftLen//2,2],dtype=spec.real.dtype)
+	result[:,:,0] = spec.real[:,:-1]
+	result[:,:,1] = spec.imag[:,:-1]
+	result[:,0,0] = (spec.real[:,0] + spec.real[:,-1]) / 2
+	result[:,0,1] = (spec.real[:,0] - spec.real[:,-1]) / 2
 	return fftLen, result
 
 def compute_power_spectrum_1d(fftFrame):
@@ -270,13 +310,36 @@ def compute_power_spectrum_2d(fftFrame):
 	'''
 	assert isinstance(fftFrame,np.ndarray) and len(fftFrame.shape) == 3
 	
+	frames, half, _ = fftFrame.shape
 	zeroth = fftFrame[:,0,0] + fftFrame[:,0,1]
 	n2th = fftFrame[:,0,0] - fftFrame[:,0,1]
 	
-	fftFrame = np.sum(fftFrame**2,axis=2)
-	fftFrame[:,0] = zeroth**2
+	# Write all bins into one output array, without the squared temporary and the appending copy
+	result = np.empty([frames,half+1],dtype=fftFrame.dtype)
+	np.einsum("ijk,ijk->ij",fftFrame,fftFrame,out=result[:,0:half])
+	result[:,0] = zeroth**2
+	result[:,half] = n2th**2
 
-	return np.append(fftFrame,(n2th**2)[:,None],axis=1)
+	return result
+
+def compute_fft_power_spectrum_2d(waveform):
+	'''
+	Compute real FFT and power spectrum in one step.
+	The result is the same as split_radix_real_fft_2d followed by compute_power_spectrum_2d, 
+	but the FFT result is not rearranged into Kaldi's split radix layout.
+
+	Args:
+		_waveform_: (2-d np.ndarray) A batch of waveforms.
+	
+	Return:
+		A new 2-d np.ndarray with shape (frames, fftLen/2+1).
+	'''
+	assert isinstance(waveform,np.ndarray) and len(waveform.shape) == 2
+	fftLen = get_padded_fft_length(waveform.shape[1])
+	spec = np.fft.rfft(waveform,n=fftLen,axis=1)
+	# View the complex values as (real, image) pairs, and sum their squares in one pass
+	pairs = spec.view(spec.real.dtype).reshape([spec.shape[0],spec.shape[1],2])
+	return np.einsum("ijk,ijk->ij",pairs,pairs)
 
 def apply_floor(feature,floor=info.EPSILON):
 	'''
@@ -289,8 +352,21 @@ def apply_floor(feature,floor=info.EPSILON):
 	Return:
 		A 2-d np.ndarray (Not new).
 	'''
-	feature[feature<floor] = floor
-	return feature
+	return np.maximum(feature,floor,out=feature)
+
+def apply_log_floor(feature,floor=info.EPSILON):
+	'''
+	Apply float floor to feature and compute the log value in place.
+
+	Args:
+		_feature_: (np.ndarray) Float feature.
+		_floor_: (float) Float floor value.
+	
+	Return:
+		A np.ndarray (Not new).
+	'''
+	np.maximum(feature,floor,out=feature)
+	return np.log(feature,out=feature)
 
 def mel_scale(freq):
 	'''
@@ -348,23 +424,35 @@ def get_mel_bins(numBins,rate,fftLen,lowFreq=20,highFreq=0):
 	delDelta = (melHigh-melLow)/(numBins+1)
 
 	result = np.zeros([numBins,numFftBins+1],dtype="float32")
-	for binIndex in range(numBins):
-		leftMel = melLow + binIndex * delDelta
-		centerMel = melLow + (binIndex+1) * delDelta
-		rightMel = melLow + (binIndex+2) * delDelta
-		for i in range(numFftBins):
-			freq = fftBinWidth * i
-			mel = mel_scale(freq)
-
-			if leftMel < mel <  rightMel:
-				if mel <= centerMel:
-					weight = (mel - leftMel)/(centerMel - leftMel)
-				else:
-					weight = (rightMel - mel)/(rightMel - centerMel)
-				result[binIndex,i] = weight
+	# Compute the triangular weights of all bins at once
+	binIndex = np.arange(numBins)[:,None]
+	leftMel = melLow + binIndex * delDelta
+	centerMel = melLow + (binIndex+1) * delDelta
+	rightMel = melLow + (binIndex+2) * delDelta
+	mel = mel_scale( fftBinWidth * np.arange(numFftBins) )[None,:]
+
+	weights = np.where(mel <= centerMel, (mel - leftMel)/(centerMel - leftMel), (rightMel - mel)/(rightMel - centerMel))
+	result[:,0:numFftBins] = np.where((leftMel < mel) & (mel < rightMel), weights, 0)
 
 	return result.T
 
+def get_mel_bins_support(melFilters):
+	'''
+	Get the range of FFT bins covered by at least one Mel filter.
+	The rows out of this range are all zero, so they can be skipped when applying the filters.
+
+	Args:
+		_melFilters_: (2-d np.ndarray) The Mel filters bank.
+	
+	Return:
+		A tuple (start, stop).
+	'''
+	assert isinstance(melFilters,np.ndarray) and len(melFilters.shape) == 2
+	nonzero = np.flatnonzero( np.any(melFilters != 0, axis=1) )
+	if len(nonzero) == 0:
+		return (0, 0)
+	return (int(nonzero[0]), int(nonzero[-1])+1)
+
 def get_padded_fft_length(points):
 	'''
 	Compute FFT length.
@@ -398,11 +486,76 @@ def get_dct_matrix(numCeps,numBins):
 	result = np.zeros([numCeps,numBins],dtype="float32")
 	result[0] = np.sqrt(1/numBins)
 	normalizer = np.sqrt(2/numBins)
-	for i in range(1,numCeps):
-		for j in range(0,numBins):
-			result[i,j] = normalizer * np.cos( np.pi/numBins*(j+0.5)*i )
+	i = np.arange(1,numCeps)[:,None]
+	j = np.arange(0,numBins)[None,:]
+	result[1:] = normalizer * np.cos( np.pi/numBins*(j+0.5)*i )
 	return result.T
 
+# The tables which have been loaded or built in this process, shared by all extractors.
+_TABLE_MEMORY = {}
+_TABLE_MEMORY_LOCK = threading.Lock()
+
+def _load_or_build(builder,*args):
+	'''
+	Get a table from the memory of this process, or load it from cache directory (memory mapped), or build it and save it.
+	The cache directory is only used if info.TABLE_CACHE_DIR has been set.
+
+	Args:
+		_builder_: (callable) The function to compute table.
+		_args_: (int) The arguments of _builder_. They are also used to name the cache file.
+	
+	Return:
+		A read-only np.ndarray.
+	'''
+	key = (builder.__name__,) + args
+	with _TABLE_MEMORY_LOCK:
+		if key not in _TABLE_MEMORY:
+			if info.TABLE_CACHE_DIR is None:
+				table = builder(*args)
+			else:
+				table = _load_or_build_file(builder,*args)
+			# The table is shared, so no extractor is allowed to modify it
+			table.setflags(write=False)
+			_TABLE_MEMORY[key] = table
+		return _TABLE_MEMORY[key]
+
+def _table_file_name(builder,*args):
+	'''
+	Name the cache file of a table.
+	The name includes the package version and a hash of the builder source,
+	so a table built by an older builder is never loaded.
+	'''
+	try:
+		source = inspect.getsource(builder).encode()
+	except (OSError,TypeError):
+		source = builder.__code__.co_code
+	digest = hashlib.sha1(source).hexdigest()[:16]
+	return "_".join( [builder.__name__,info.VERSION.plain,digest] + [ str(arg) for arg in args ] ) + ".npy"
+
+def _load_or_build_file(builder,*args):
+	'''
+	Load a table from cache directory (memory mapped) or build it and save it.
+	'''
+	cacheDir = info.TABLE_CACHE_DIR
+	filePath = os.path.join(cacheDir,_table_file_name(builder,*args))
+	if os.path.isfile(filePath):
+		try:
+			return np.load(filePath,mmap_mode="r")
+		except (OSError,ValueError):
+			pass
+	table = builder(*args)
+	# Write a temporary file firstly so that other processes never load a partial table
+	tempPath = filePath + f".{os.getpid()}.{threading.get_ident()}.tmp"
+	try:
+		os.makedirs(cacheDir,exist_ok=True)
+		with open(tempPath,"wb") as fw:
+			np.save(fw,table)
+		os.replace(tempPath,filePath)
+	except OSError:
+		if os.path.isfile(tempPath):
+			os.remove(tempPath)
+	return table
+
 def get_cepstral_lifter_coeff(dim,factor=22):
 	'''
 	Compute cepstral lifter coefficient.
@@ -421,7 +574,31 @@ def get_cepstral_lifter_coeff(dim,factor=22):
 		result[i] = 1.0 + 0.5*factor*np.sin(np.pi*i/factor)
 	return result
 
-def add_deltas(feat, order=2, window=2):
+def get_delta_scales(order=2,window=2):
+	'''
+	Compute the delta filter coefficients with the same recursion as Kaldi.
+
+	Args:
+		_order_: (int) The order of delta.
+		_window_: (int) The window size of delta.
+	
+	Return:
+		A list of 1-d np.ndarray. The i-th array is the filter of i-th order with length 2*i*window+1.
+	'''
+	assert isinstance(order,int) and order > 0
+	assert isinstance(window,int) and window > 0
+
+	normalizer = 2 * sum( j**2 for j in range(1,window+1) )
+	scales = [ np.ones([1,],dtype="float32") ]
+	for i in range(1,order+1):
+		prev = scales[-1]
+		cur = np.zeros([len(prev)+2*window,],dtype="float32")
+		for j in range(-window,window+1):
+			cur[j+window:j+window+len(prev)] += j * prev
+		scales.append( cur / normalizer )
+	return scales
+
+def add_deltas(feat, order=2, window=2, out=None):
 	'''
 	Append delta feature.
 
@@ -429,24 +606,52 @@ def add_deltas(feat, order=2, window=2):
 		_feat_: (2-d np.ndarray) Feature with shape (frames, dim).
 		_order_: (int).
 		_window_: (int).
+		_out_: (None or 2-d np.ndarray) A float32 buffer with shape (frames, dim * (order+1)) to write the result in.
 	
 	Return:
-		An new 2-d np.ndarray with shape: (frames, dim * (order+1)).
+		An new 2-d np.ndarray with shape: (frames, dim * (order+1)). If _out_ is given, return _out_.
 	'''
 	assert isinstance(feat,np.ndarray) and len(feat.shape) == 2
 	assert isinstance(order,int) and order > 0
 	assert isinstance(window,int) and window > 0
 
-	# return cutils.add_deltas(feat,order,window)
+	frames, dims = feat.shape
+	scales = get_delta_scales(order,window)
+	# Repeat the edge frames like Kaldi does
+	maxOffset = order * window
+	padded = np.pad(feat.astype("float32",copy=False),((maxOffset,maxOffset),(0,0)),mode="edge")
 
-	frames = feat.shape[0]
-	dims = feat.shape[1]
-	inputs = f"{frames} {dims} ".encode() + encode_vector_temp( feat.reshape(-1) )
-	cmd = os.path.join(info.CMDROOT,f"exkaldi-add-deltas --order {order} --window {window}")
-	out = run_exkaldi_shell_command(cmd,inputs=inputs)
-	return np.array(out,dtype="float32").reshape([frames,-1])
+	if out is None:
+		result = np.empty([frames,dims*(order+1)],dtype="float32")
+	else:
+		assert isinstance(out,np.ndarray) and out.shape == (frames,dims*(order+1)) and out.dtype == np.float32
+		result = out
+	result[:,0:dims] = feat
+	temp = np.empty([frames,dims],dtype="float32")
+	for i in range(1,order+1):
+		block = result[:,i*dims:(i+1)*dims]
+		half = (len(scales[i])-1)//2
+		# The first term initializes the output, so the result needs no zero filling
+		if scales[i][half] != 0:
+			np.multiply(padded[maxOffset:maxOffset+frames], scales[i][half], out=block)
+		else:
+			block.fill(0)
+		# The filter is antisymmetric for odd order and symmetric for even order,
+		# so the two frames at the same distance share one multiplication.
+		for k in range(1,half+1):
+			scale = scales[i][half+k]
+			if scale != 0:
+				right = padded[maxOffset+k:maxOffset+k+frames]
+				left = padded[maxOffset-k:maxOffset-k+frames]
+				if i % 2 == 1:
+					np.subtract(right,left,out=temp)
+				else:
+					np.add(right,left,out=temp)
+				temp *= scale
+				block += temp
+	return result
 
-def splice_feats(feat, left, right):
+def splice_feats(feat, left, right, padding=True):
 	'''
 	Splice the left and right context of feature.
 
@@ -454,15 +659,25 @@ def splice_feats(feat, left, right):
 		_feat_: (2-d np.ndarray) Feature with shape (frames, dim).
 		_left_: (int).
 		_right_: (int).
+		_padding_: (bool) If True, repeat the edge frames. If False, only splice the frames which have full context.
 	
 	Return:
 		An new 2-d np.ndarray with shape: (frames, dim * (left+right+1)).
+		If _padding_ is False, the shape is: (frames - left - right, dim * (left+right+1)).
 	'''
 	assert isinstance(feat,np.ndarray) and len(feat.shape) == 2
 	assert isinstance(left,int) and left >= 0
 	assert isinstance(right,int) and right >= 0
 	if left == 0 and right ==0: return feat
-	return cutils.splice_feat(feat, left, right)
+
+	frames, dims = feat.shape
+	if padding:
+		# Repeat the edge frames like Kaldi does
+		feat = np.pad(feat,((left,right),(0,0)),mode="edge")
+	else:
+		assert frames > left + right, "No enough frames to splice without padding."
+	windows = np.lib.stride_tricks.sliding_window_view(feat,(left+right+1,dims))[:,0]
+	return windows.reshape([len(windows),-1]).copy()
 
 # This function is wrapped from kaldi_io library.
 def load_lda_matrix(ldaFile):
@@ -495,20 +710,21 @@ class MatrixFeatureExtractor(Component):
 	'''
 	The base class of a feature extractor.
 	Please implement the self.extract_function by your function.
+	The function receives a float32 work buffer, so it is allowed to modify the batch in place.
 	'''
 	def __init__(self,extFunc,minParallelSize=10,oKey="data",name=None):
 		'''
 		Args:
 			_frameDim_: (int) The dim. of frame.
 			_batchSize_: (int) Batch size.
-			_minParallelSize_: (int) If _batchSize_ >= minParallelSize, run two parallel threads for one batch features.
+			_minParallelSize_: (int) Not used any longer. It is kept for compatibility.
 			_name_: (str) Name.
 		'''
 		super().__init__(oKey=oKey,name=name)
 		assert isinstance(minParallelSize,int) and minParallelSize >= 2
 		assert callable(extFunc)
 		self.__extract_function_ = extFunc
-		self.__minParallelBatchSize = minParallelSize//2
+		self.__floatBuffer = None
 
 	def core_loop(self):
 
@@ -517,7 +733,6 @@ class MatrixFeatureExtractor(Component):
 		while True:
 
 			action = self.decide_action()
-			self.__featureCache = [[],[]]
 
 			if action is True:
 				
@@ -530,34 +745,15 @@ class MatrixFeatureExtractor(Component):
 					assert isinstance(mat, np.ndarray) and len(mat.shape) == 2
 
 					bsize = len(mat)
-					if self.__firstStep or len(mat) < self.__minParallelBatchSize:
-						newMat = self.__extract_function_( mat )
-						if isinstance(newMat,np.ndarray):
-							newMat = [newMat,]
-						else:
-							assert isinstance(newMat,(tuple,list))
-					else:
-						mid = bsize // 2
-
-						### open thread 1 to compute first half part
-						thread1 = threading.Thread(target=self.__extract_parallel,args=(mat[0:mid],0,))
-						thread1.setDaemon(True)
-						thread1.start()
-						### open thread 2 to compute second half part
-						thread2 = threading.Thread(target=self.__extract_parallel,args=(mat[mid:],1,))
-						thread2.setDaemon(True)
-						thread2.start()
-					
-						thread1.join()
-						thread2.join()
-						
-						if None in self.__featureCache:
-							raise Exception("Extraction functions had errors.")
-
-						### Concat
-						newMat = []
-						for i in range( len(self.__featureCache[0]) ):
-							newMat.append( np.concatenate( [self.__featureCache[0][i],self.__featureCache[1][i]],axis=0) )
+					# Convert the batch into a persistent float32 work buffer only once
+					if self.__floatBuffer is None or len(self.__floatBuffer) < bsize or self.__floatBuffer.shape[1] != mat.shape[1]:
+						self.__floatBuffer = np.empty(mat.shape,dtype="float32")
+					np.copyto(self.__floatBuffer[:bsize],mat,casting="unsafe")
+					mat = self.__floatBuffer[:bsize]
+
+					# Extract the whole batch with one call.
+					# Splitting it into two threads only makes the FFT and the matrix products smaller.
+					newMat = self.__extract(mat)
 
 					if self.__firstStep:
 						for mat in newMat:
@@ -576,21 +772,16 @@ class MatrixFeatureExtractor(Component):
 			else:
 				break
 
-	def __extract_parallel(self,featChunk,ID):
+	def __extract(self,featChunk):
 		'''
-		A thread function to compute feature.
+		Compute feature and always return a list of outputs.
 		'''
-		try:
-			outs = self.__extract_function_(featChunk)
-		except Exception as e:
-			self.__featureCache[ID] = None
-			raise e
+		outs = self.__extract_function_(featChunk)
+		if isinstance(outs,np.ndarray):
+			outs = [outs,]
 		else:
-			if isinstance(outs,np.ndarray):
-				outs = [outs,]
-			else:
-				assert isinstance(outs,(tuple,list))
-			self.__featureCache[ID] = outs
+			assert isinstance(outs,(tuple,list))
+		return outs
 
 class SpectrogramExtractor(MatrixFeatureExtractor):
 	'''
@@ -611,7 +802,7 @@ class SpectrogramExtractor(MatrixFeatureExtractor):
 			_removeDC_: (bool) If True remove DC offset.
 			_preemphCoeff_: (float) Pre-emphasize factor.
 			_blackmanCoeff_: (float) Blackman window coefficient.
-			_minParallelSize_: (int) If _batchSize_ >= minParallelSize, run two threads to extract feature.
+			_minParallelSize_: (int) Not used any longer. It is kept for compatibility.
 			_name_: (str) None.
 		'''
 		super().__init__(extFunc=self.__extract_function,minParallelSize=minParallelSize,oKey=oKey,name=name)
@@ -627,6 +818,7 @@ class SpectrogramExtractor(MatrixFeatureExtractor):
 		self.__remove_dc_offset = removeDC
 		self.__preemph_coeff = preemphCoeff
 		self.__dither_factor = dither
+		self.__rng = np.random.default_rng()
 
 		self.__winInfo = (winType, blackmanCoeff)
 		self.__window = None
@@ -635,32 +827,30 @@ class SpectrogramExtractor(MatrixFeatureExtractor):
 
 		if self.__window is None:
 			frameDim = frames.shape[1]
-			self.__window = get_window_function(frameDim, 
-																					self.__winInfo[0], 
-																					self.__winInfo[1],
-																				)
+			self.__window = _load_or_build(get_window_function,
+									 frameDim,
+									 self.__winInfo[0],
+									 self.__winInfo[1],
+									)
 		
 		if self.__dither_factor != 0: 
-			frames = dither_singal_2d(frames, self.__dither_factor)
+			frames = dither_singal_2d(frames, self.__dither_factor, self.__rng)
 		if self.__remove_dc_offset: 
-			frames = remove_dc_offset_2d(frames)
+			frames = remove_dc_offset_2d(frames, out=frames)
 		if self.__need_raw_energy: 
 			energies = compute_log_energy_2d(frames)
 		if self.__preemph_coeff > 0:
 			frames = pre_emphasize_2d(frames, self.__preemph_coeff)
 		
 		frames *= self.__window
-
-		if not self.__need_raw_energy:
-			energies = compute_log_energy_2d(frames)
 		
-		_, frames = split_radix_real_fft_2d(frames)
-		frames = compute_power_spectrum_2d(frames)
-		frames = apply_floor(frames)
-		frames = np.log(frames)
+		frames = compute_fft_power_spectrum_2d(frames)
+		if not self.__need_raw_energy:
+			energies = compute_log_energy_from_power_2d(frames)
+		frames = apply_log_floor(frames)
 
 		if self.__energy_floor != 0:
-			energies[ energies < self.__energy_floor ] = self.__energy_floor
+			np.maximum(energies, self.__energy_floor, out=energies)
 
 		frames[:,0] = energies
 
@@ -695,7 +885,7 @@ class FbankExtractor(MatrixFeatureExtractor):
 			_lowFreq_: (int) The minimum frequency.
 			_lowFreq_: (int) The maximum frequency.
 			_useLog_: (bool) If True, compute log fBank.
-			_minParallelSize_: (int) If _batchSize_ >= minParallelSize, run two threads to extract feature.
+			_minParallelSize_: (int) Not used any longer. It is kept for compatibility.
 			_name_: (str) None.
 		'''        
 		super().__init__(extFunc=self.__extract_function,minParallelSize=minParallelSize,oKey=oKey,name=name)
@@ -718,6 +908,7 @@ class FbankExtractor(MatrixFeatureExtractor):
 		self.__remove_dc_offset = removeDC
 		self.__preemph_coeff = preemphCoeff
 		self.__dither = dither
+		self.__rng = np.random.default_rng()
 		self.__usePower = usePower
 		self.__useLog = useLog
 	
@@ -725,50 +916,59 @@ class FbankExtractor(MatrixFeatureExtractor):
 		self.__window = None
 		self.__melInfo = (numBins,rate,lowFreq,highFreq)
 		self.__melFilters = None
+		self.__melSupport = None
 
 	def __extract_function(self,frames):
 		
 		if self.__window is None:
 			frameDim = frames.shape[1]
-			self.__window = get_window_function(frameDim, 
-																					self.__winInfo[0], 
-																					self.__winInfo[1],
-																				)
+			self.__window = _load_or_build(get_window_function,
+									 frameDim,
+									 self.__winInfo[0],
+									 self.__winInfo[1],
+									)
 			fftLen = get_padded_fft_length(frameDim)
-			self.__melFilters = get_mel_bins(self.__melInfo[0],
-																			 self.__melInfo[1],
-																			 fftLen,
-																			 self.__melInfo[2],
-																			 self.__melInfo[3],
-																			)
+			self.__melFilters = _load_or_build(get_mel_bins,
+																				 self.__melInfo[0],
+																				 self.__melInfo[1],
+																				 fftLen,
+																				 self.__melInfo[2],
+																				 self.__melInfo[3],
+																				)
+			# Only keep the FFT bins which any filter covers
+			self.__melSupport = get_mel_bins_support(self.__melFilters)
+			self.__melFilters = self.__melFilters[self.__melSupport[0]:self.__melSupport[1]]
 
 		if self.__dither != 0:
-			frames = dither_singal_2d(frames, self.__dither)
+			frames = dither_singal_2d(frames, self.__dither, self.__rng)
 		if self.__remove_dc_offset:
-			frames = remove_dc_offset_2d(frames)
+			frames = remove_dc_offset_2d(frames, out=frames)
 		if self.__add_energy and self.__need_raw_energy:
 			energies = compute_log_energy_2d(frames)
 		if self.__preemph_coeff:
 			frames = pre_emphasize_2d(frames, self.__preemph_coeff)
 		
 		frames *= self.__window
-		if self.__add_energy and not self.__need_raw_energy:
-			energies = compute_log_energy_2d(frames)
 
-		_, frames = split_radix_real_fft_2d(frames)
-		frames = compute_power_spectrum_2d(frames)
+		frames = compute_fft_power_spectrum_2d(frames)
+		if self.__add_energy and not self.__need_raw_energy:
+			energies = compute_log_energy_from_power_2d(frames)
+		# Keep the tables in the precision of the spectrum, so np.dot does not upcast them for every batch
+		if self.__melFilters.dtype != frames.dtype:
+			self.__melFilters = self.__melFilters.astype(frames.dtype)
 
+		frames = frames[:,self.__melSupport[0]:self.__melSupport[1]]
 		if not self.__usePower:
-			frames = frames**0.5
+			# The spectrum is a new array owned by this call, so take the root in place
+			np.sqrt(frames, out=frames)
 		frames = np.dot( frames, self.__melFilters )
 		
 		if self.__useLog:
-			frames = apply_floor(frames)
-			frames = np.log(frames)
+			frames = apply_log_floor(frames)
 
 		if self.__add_energy:
 			if self.__energy_floor != 0:
-				energies[ energies < self.__energy_floor ] = self.__energy_floor
+				np.maximum(energies, self.__energy_floor, out=energies)
 			frames = np.concatenate([energies[:,None],frames],axis=1)
 
 		return frames
@@ -804,7 +1004,7 @@ class MfccExtractor(MatrixFeatureExtractor):
 			_useLog_: (bool) If True, compute log fBank.
 			_cepstralLifter_: (int) MFCC lifter factor.
 			_numCeps_: (int) The dim. of MFCC feature.
-			_minParallelSize_: (int) If _batchSize_ >= minParallelSize, run two threads to extract feature.
+			_minParallelSize_: (int) Not used any longer. It is kept for compatibility.
 			_name_: (str) None.
 		'''     
 		super().__init__(extFunc=self.__extract_function,minParallelSize=minParallelSize,oKey=oKey,name=name)
@@ -828,60 +1028,67 @@ class MfccExtractor(MatrixFeatureExtractor):
 		self.__remove_dc_offset = removeDC
 		self.__preemph_coeff = preemphCoeff
 		self.__dither = dither
+		self.__rng = np.random.default_rng()
 		self.__useLog = useLog
 		
 		self.__winInfo = (winType, blackmanCoeff)
 		self.__window = None
 		self.__melInfo = (numBins,rate,lowFreq,highFreq)
 		self.__melFilters = None
+		self.__melSupport = None
 
-		self.__dctMat = get_dct_matrix(numCeps=numCeps,numBins=numBins)
+		self.__dctMat = _load_or_build(get_dct_matrix,numCeps,numBins)
+		# Fold the cepstral lifter into the DCT matrix, so both are applied by one np.dot
 		if cepstralLifter > 0:
-			self.__cepsCoeff = get_cepstral_lifter_coeff(dim=numCeps,factor=cepstralLifter)
-		else:
-			self.__cepsCoeff = 1
+			self.__dctMat = self.__dctMat * get_cepstral_lifter_coeff(dim=numCeps,factor=cepstralLifter)
 
 	def __extract_function(self,frames):
 	
 		if self.__window is None:
 			frameDim = frames.shape[1]
-			self.__window = get_window_function(frameDim, 
-																					self.__winInfo[0], 
-																					self.__winInfo[1],
-																				)
+			self.__window = _load_or_build(get_window_function,
+									 frameDim,
+									 self.__winInfo[0],
+									 self.__winInfo[1],
+									)
 			fftLen = get_padded_fft_length(frameDim)
-			self.__melFilters = get_mel_bins(self.__melInfo[0],
-																			 self.__melInfo[1],
-																			 fftLen,
-																			 self.__melInfo[2],
-																			 self.__melInfo[3],
-																			)
+			self.__melFilters = _load_or_build(get_mel_bins,
+																				 self.__melInfo[0],
+																				 self.__melInfo[1],
+																				 fftLen,
+																				 self.__melInfo[2],
+																				 self.__melInfo[3],
+																				)
+			# Only keep the FFT bins which any filter covers
+			self.__melSupport = get_mel_bins_support(self.__melFilters)
+			self.__melFilters = self.__melFilters[self.__melSupport[0]:self.__melSupport[1]]
 
 		if self.__dither != 0:
-			frames = dither_singal_2d(frames, self.__dither)
+			frames = dither_singal_2d(frames, self.__dither, self.__rng)
 		if self.__remove_dc_offset:
-			frames = remove_dc_offset_2d(frames)
+			frames = remove_dc_offset_2d(frames, out=frames)
 		if self.__use_energy and self.__need_raw_energy:
 			energies = compute_log_energy_2d(frames)
 		if self.__preemph_coeff:
 			frames = pre_emphasize_2d(frames, self.__preemph_coeff)
 		
 		frames *= self.__window
-		if self.__use_energy and not self.__need_raw_energy:
-			energies = compute_log_energy_2d(frames)
 
-		_, frames = split_radix_real_fft_2d(frames)
-		frames = compute_power_spectrum_2d(frames)
-
-		frames = np.dot( frames, self.__melFilters )
-		frames = apply_floor(frames)
-		frames = np.log(frames)
+		frames = compute_fft_power_spectrum_2d(frames)
+		if self.__use_energy and not self.__need_raw_energy:
+			energies = compute_log_energy_from_power_2d(frames)
+		# Keep the tables in the precision of the spectrum, so np.dot does not upcast them for every batch
+		if self.__melFilters.dtype != frames.dtype:
+			self.__melFilters = self.__melFilters.astype(frames.dtype)
+			self.__dctMat = self.__dctMat.astype(frames.dtype)
+
+		frames = np.dot( frames[:,self.__melSupport[0]:self.__melSupport[1]], self.__melFilters )
+		frames = apply_log_floor(frames)
 		frames = frames.dot(self.__dctMat)
-		frames = frames * self.__cepsCoeff
 
 		if self.__use_energy:
 			if self.__energy_floor != 0:
-				energies[ energies < self.__energy_floor ] = self.__energy_floor
+				np.maximum(energies, self.__energy_floor, out=energies)
 			frames[:,0] = energies
 
 		return frames
@@ -923,6 +1130,7 @@ class MixtureExtractor(MatrixFeatureExtractor):
 		assert isinstance(rate,int)
 		assert isinstance(dither,float) and dither >= 0.0
 		self.__dither_factor = dither
+		self.__rng = np.random.default_rng()
 		assert isinstance(removeDC,bool)
 		self.__remove_dc_offset = removeDC
 		assert isinstance(rawEnergy,bool)
@@ -943,6 +1151,7 @@ class MixtureExtractor(MatrixFeatureExtractor):
 		self.__fftLen = None
 		self.__melInfo = (numBins,rate,lowFreq,highFreq)
 		self.__melFilters = None
+		self.__melSupport = None
 		assert isinstance(useEnergyForFbank,bool)
 		self.__use_energy_fbank = useEnergyForFbank
 		assert isinstance(useLogForFbank,bool)
@@ -955,11 +1164,10 @@ class MixtureExtractor(MatrixFeatureExtractor):
 		assert isinstance(numCeps,int) and 0 < numCeps <= numBins
 		assert isinstance(useEnergyForMfcc,bool)
 		self.__use_energy_mfcc = useEnergyForMfcc
-		self.__dctMat = get_dct_matrix(numCeps=numCeps,numBins=numBins)
+		self.__dctMat = _load_or_build(get_dct_matrix,numCeps,numBins)
+		# Fold the cepstral lifter into the DCT matrix, so both are applied by one np.dot
 		if cepstralLifter > 0:
-			self.__cepsCoeff = get_cepstral_lifter_coeff(dim=numCeps,factor=cepstralLifter)
-		else:
-			self.__cepsCoeff = 1
+			self.__dctMat = self.__dctMat * get_cepstral_lifter_coeff(dim=numCeps,factor=cepstralLifter)
 
 	def __extract_function(self,frames):
 
@@ -967,24 +1175,29 @@ class MixtureExtractor(MatrixFeatureExtractor):
 
 		if self.__window is None:
 			frameDim = frames.shape[1]
-			self.__window = get_window_function(frameDim, 
-																					self.__winInfo[0], 
-																					self.__winInfo[1],
-																				)
+			self.__window = _load_or_build(get_window_function,
+									 frameDim,
+									 self.__winInfo[0],
+									 self.__winInfo[1],
+									)
 			fftLen = get_padded_fft_length(frameDim)
-			self.__melFilters = get_mel_bins(self.__melInfo[0],
-																			 self.__melInfo[1],
-																			 fftLen,
-																			 self.__melInfo[2],
-																			 self.__melInfo[3],
-																			)
+			self.__melFilters = _load_or_build(get_mel_bins,
+																				 self.__melInfo[0],
+																				 self.__melInfo[1],
+																				 fftLen,
+																				 self.__melInfo[2],
+																				 self.__melInfo[3],
+																				)
+			# Only keep the FFT bins which any filter covers
+			self.__melSupport = get_mel_bins_support(self.__melFilters)
+			self.__melFilters = self.__melFilters[self.__melSupport[0]:self.__melSupport[1]]
 
 		# Dither singal
 		if self.__dither_factor != 0: 
-			frames = dither_singal_2d(frames, self.__dither_factor)
+			frames = dither_singal_2d(frames, self.__dither_factor, self.__rng)
 		# Remove dc offset
 		if self.__remove_dc_offset: 
-			frames = remove_dc_offset_2d(frames)
+			frames = remove_dc_offset_2d(frames, out=frames)
 		# Compute raw energy
 		if self.__need_raw_energy: 
 			energies = compute_log_energy_2d(frames)
@@ -993,47 +1206,60 @@ class MixtureExtractor(MatrixFeatureExtractor):
 			frames = pre_emphasize_2d(frames, self.__preemph_coeff)
 		# Add window
 		frames *= self.__window
-		# Compute energy
+		# FFT and power spectrogram
+		frames = compute_fft_power_spectrum_2d(frames)
+		# Compute energy from the power spectrum
 		if not self.__need_raw_energy:
-			energies = compute_log_energy_2d(frames)
+			energies = compute_log_energy_from_power_2d(frames)
 		# Apply energy floor
 		if self.__energy_floor != 0:
-			energies[ energies < self.__energy_floor ] = self.__energy_floor
-		# FFT
-		_, frames = split_radix_real_fft_2d(frames)
-		# Power spectrogram
-		frames = compute_power_spectrum_2d(frames)
+			np.maximum(energies, self.__energy_floor, out=energies)
+		# Keep the tables in the precision of the spectrum, so np.dot does not upcast them for every batch
+		if self.__melFilters.dtype != frames.dtype:
+			self.__melFilters = self.__melFilters.astype(frames.dtype)
+			self.__dctMat = self.__dctMat.astype(frames.dtype)
 		
 		outFeats = {}
 		# Compute the spectrogram feature
 		if "spectrogram" in self.__mixType:
-			specFrames = frames.copy()
-			specFrames = apply_floor( specFrames )
-			specFrames = np.log( specFrames )
+			# np.maximum writes a new array, so the spectrum itself is kept for the other features
+			specFrames = np.maximum( frames, info.EPSILON )
+			specFrames = np.log( specFrames, out=specFrames )
 			specFrames[:,0] = energies
 			outFeats[ self.oKey[ self.__mixType.index("spectrogram") ] ] = specFrames
 
+		# The Mel projection of the power spectrum, which can be shared by fbank and mfcc
+		melFrames = None
+		melIsLog = False
+
 		# Compute the fbank feature
 		if "fbank" in self.__mixType:
-			fbankFrames = frames.copy()
+			# np.dot does not modify the spectrum, so a view is enough here
+			fbankFrames = frames[:,self.__melSupport[0]:self.__melSupport[1]]
 			if not self.__use_power_fbank:
 				fbankFrames = fbankFrames**0.5
 			fbankFrames = np.dot( fbankFrames, self.__melFilters )
 			if self.__use_log_fbank:
-				fbankFrames = apply_floor(fbankFrames)
-				fbankFrames = np.log(fbankFrames)
+				fbankFrames = apply_log_floor(fbankFrames)
+			if self.__use_power_fbank:
+				melFrames = fbankFrames
+				melIsLog = self.__use_log_fbank
 			if self.__use_energy_fbank:
 				fbankFrames = np.concatenate([energies[:,None],fbankFrames],axis=1)
 			outFeats[ self.oKey[ self.__mixType.index("fbank") ] ] = fbankFrames
 
 		# Compute the mfcc feature
 		if "mfcc" in self.__mixType:
-			mfccFeats = frames
-			mfccFeats = np.dot( mfccFeats, self.__melFilters )
-			mfccFeats = apply_floor( mfccFeats )
-			mfccFeats = np.log( mfccFeats )
+			if melFrames is None:
+				mfccFeats = frames[:,self.__melSupport[0]:self.__melSupport[1]]
+				mfccFeats = np.dot( mfccFeats, self.__melFilters )
+				mfccFeats = apply_log_floor( mfccFeats )
+			elif melIsLog:
+				mfccFeats = melFrames
+			else:
+				# The fbank feature holds this projection, so take the log of a copy
+				mfccFeats = apply_log_floor( melFrames.copy() )
 			mfccFeats = mfccFeats.dot( self.__dctMat )
-			mfccFeats = mfccFeats * self.__cepsCoeff
 			if self.__use_energy_mfcc:
 				mfccFeats[:,0] = energies
 			outFeats[ self.oKey[ self.__mixType.index("mfcc") ] ] = mfccFeats
@@ -1056,18 +1282,19 @@ def compute_spk_stats(feats):
 	'''
 	if not isinstance(feats,(list,tuple)):
 		feats = [feats,]
-	dim = None
-	stats = None
+	if len(feats) == 0:
+		return None
 	for feat in feats:
 		assert isinstance(feat,np.ndarray) and len(feat.shape) == 2, "<feats> should be 2-d NumPy array." 
-		if dim is None:
-			dim = feat.shape[1]
-			stats = np.zeros([2,dim+1],dtype=feat.dtype)
-		else:
-			assert dim == feat.shape[1], "Feature dims do not match!"
-		stats[0,0:dim] += np.sum(feat,axis=0)
-		stats[1,0:dim] += np.sum(feat**2,axis=0)
-		stats[0,dim] += len(feat)
+		assert feats[0].shape[1] == feat.shape[1], "Feature dims do not match!"
+	# Compute the statistics of all utterances at once
+	dtype = feats[0].dtype
+	feats = feats[0] if len(feats) == 1 else np.concatenate(feats,axis=0)
+	dim = feats.shape[1]
+	stats = np.zeros([2,dim+1],dtype=dtype)
+	stats[0,0:dim] = np.sum(feats,axis=0)
+	stats[1,0:dim] = np.einsum("ij,ij->j",feats,feats)
+	stats[0,dim] = len(feats)
 	
 	return stats
 		
@@ -1086,57 +1313,80 @@ def get_kaldi_cmvn(fileName,spk=None):
 	assert spk is None or isinstance(spk,str), f"<spk> should be a string."
 
 	result = None
-	with open(fileName, 'rb') as fp:
-		while True:
-			# read utterance ID
-			utt = ''
-			while True:
-				char = fp.read(1).decode()
-				if (char == '') or (char == ' '):break
-				utt += char
-			utt = utt.strip()
-			if utt == '':
-				if fp.read() == b'': break
-				else: raise Exception("Miss utterance ID before utterance in stats file.")
-			# read binary symbol
-			binarySymbol = fp.read(2).decode()
-			if binarySymbol == '\0B':
-				sizeSymbol = fp.read(1).decode()
-				if sizeSymbol not in ["C","F","D"]:
-					raise Exception(f"Missed format flag. This might not be a kaldi stats file.")
-				dataType = sizeSymbol + fp.read(2).decode() 
-				if dataType == 'CM ':
-					raise Exception("Unsupported to read compressed binary kaldi matrix data.")                    
-				elif dataType == 'FM ':
-					sampleSize = 4
-					dtype = "float32"
-				elif dataType == 'DM ':
-					sampleSize = 8
-					dtype = "float64"
-				else:
-					raise Exception(f"Expected data type FM -> float32, DM -> float64 but got {dataType}.")
-				s1,rows,s2,cols = np.frombuffer(fp.read(10),dtype="int8,int32,int8,int32",count=1)[0]
-				rows = int(rows)
-				cols = int(cols)
-				bufSize = rows * cols * sampleSize
-				buf = fp.read(bufSize)
-			else:
-				raise Exception("Miss binary symbol before utterance in stats file.")
-
-			data = np.frombuffer(buf,dtype=dtype).reshape([rows,cols])
-			if spk == utt:
-				return data
-			elif spk is None:
-				if result is None:
-					result = data.copy()
-				else:
-					result += data
+	# An empty file can not be memory mapped
+	if os.path.getsize(fileName) > 0:
+		with open(fileName, 'rb') as fp:
+			with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+				result = _read_kaldi_stats(mm,spk)
 
-	if spk is not None:
+	if spk is not None and result is None:
 		raise Exception(f"No such utterance: {spk}.")
 	else:
 		return result
 
+def _read_kaldi_stats(mm,spk=None):
+	'''
+	Read the statistics from a memory mapped Kaldi stats file.
+	The matrices are viewed from the mapped pages directly, and only the returned result is copied,
+	so no view is left when the file is closed.
+
+	Args:
+		_mm_: (mmap.mmap) The mapped file.
+		_spk_: (str) Speaker ID. If None, sum all statistics.
+	
+	Return:
+		A 2-d array or None if _spk_ is not found.
+	'''
+	result = None
+	pos = 0
+	size = len(mm)
+	while True:
+		# read utterance ID
+		end = mm.find(b' ', pos)
+		if end == -1:
+			end = size
+		utt = mm[pos:end].decode().strip()
+		pos = end + 1
+		if utt == '':
+			if pos >= size: break
+			else: raise Exception("Miss utterance ID before utterance in stats file.")
+		# read binary symbol, format flag and matrix shape at once
+		header = mm[pos:pos+15]
+		pos += 15
+		if header[0:2] == b'\0B':
+			sizeSymbol = header[2:3].decode()
+			if sizeSymbol not in ["C","F","D"]:
+				raise Exception(f"Missed format flag. This might not be a kaldi stats file.")
+			dataType = header[2:5].decode()
+			if dataType == 'CM ':
+				raise Exception("Unsupported to read compressed binary kaldi matrix data.")                    
+			elif dataType == 'FM ':
+				sampleSize = 4
+				dtype = "float32"
+			elif dataType == 'DM ':
+				sampleSize = 8
+				dtype = "float64"
+			else:
+				raise Exception(f"Expected data type FM -> float32, DM -> float64 but got {dataType}.")
+			s1,rows,s2,cols = np.frombuffer(header[5:15],dtype="int8,int32,int8,int32",count=1)[0]
+			rows = int(rows)
+			cols = int(cols)
+			bufSize = rows * cols * sampleSize
+		else:
+			raise Exception("Miss binary symbol before utterance in stats file.")
+
+		data = np.frombuffer(mm,dtype=dtype,count=rows*cols,offset=pos).reshape([rows,cols])
+		pos += bufSize
+		if spk == utt:
+			return data.copy()
+		elif spk is None:
+			if result is None:
+				result = data.copy()
+			else:
+				result += data
+
+	return result
+
 def spk_to_utt(spk,spk2utt):
 	'''
 	Args:
@@ -1185,6 +1435,32 @@ def utt_to_spk(utt,utt2spk):
 	return None
 
 '''A base class for CMV normalizer'''
+def _owned_float_frames(frames,inPlace=False):
+	'''
+	Get a float array of frames which can be normalized in place.
+	_frames_ is used directly only if it is a float array and _inPlace_ is True, otherwise a new float array is created.
+	'''
+	if not np.issubdtype(frames.dtype,np.floating):
+		return frames.astype("float64")
+	elif inPlace:
+		return frames
+	else:
+		return frames.copy()
+
+def _apply_scale_and_bias(frames,scale,bias,casts):
+	'''
+	Compute frames * scale + bias in place.
+	_scale_ and _bias_ are kept in float64 and their casts to the dtype of frames are cached in dict _casts_,
+	so they are not upcasted for every chunk.
+	'''
+	if frames.dtype not in casts:
+		casts[frames.dtype] = ( None if scale is None else scale.astype(frames.dtype), bias.astype(frames.dtype) )
+	scale, bias = casts[frames.dtype]
+	if scale is not None:
+		np.multiply(frames, scale, out=frames)
+	np.add(frames, bias, out=frames)
+	return frames
+
 class CMVNormalizer(ExKaldiRTBase):
 	'''
 	CMVN used to be embeded in FeatureProcesser.
@@ -1245,6 +1521,15 @@ class ConstantCMVNormalizer(CMVNormalizer):
 
 		self.__cmvn = self.__cmv / self.__counter
 		self.__dim = self.__cmvn.shape[1]
+		# Precompute the scale and bias in float64, so the normalization is one multiplication and one addition
+		cmvn = self.__cmvn.astype("float64")
+		if self.__std:
+			self.__scale = 1.0 / cmvn[1]
+			self.__bias = - cmvn[0] * self.__scale
+		else:
+			self.__scale = None
+			self.__bias = - cmvn[0]
+		self.__casts = {}
 	
 	@property
 	def dim(self):
@@ -1253,25 +1538,31 @@ class ConstantCMVNormalizer(CMVNormalizer):
 		'''
 		return self.__dim
 
-	def apply(self,frames):
+	def apply(self,frames,inPlace=False):
 		'''
 		Apply CMVN to feature.
 		If the dim of feature > the dim of cmvn, you can set offet to set cmvn range.
+
+		Args:
+			_frames_: (2-d array) The feature.
+			_inPlace_: (bool) If True and _frames_ is a float array, normalize it directly. Otherwise, a new float array is returned.
 		'''
 		if len(frames) == 0:
 			return frames
 		# if did not set the offet
 		if self.offset == -1:
 			assert frames.shape[1] == self.dim, f"{self.name}: Feature dim dose not match CMVN dim, {frames.shape[1]} != {self.dim}. "
-			return ((frames - self.__cmvn[0])/self.__cmvn[1]) if self.__std else (frames - self.__cmvn[0])
+			frames = _owned_float_frames(frames,inPlace)
+			sliceFrames = frames
 		# if had offset
 		else:
 			endIndex = self.offset + self.dim
 			assert endIndex <= frames.shape[1], f"{self.name}: cmvn dim range over flow, feature dim: {frames.shape[1]}, cmvn dim: {endIndex}."
+			frames = _owned_float_frames(frames,inPlace)
 			sliceFrames = frames[:,self.offset:endIndex]
-			result = ((sliceFrames - self.__cmvn[0])/self.__cmvn[1]) if self.__std else (sliceFrames - self.__cmvn[0])
-			frames[:,self.offset:endIndex] = result
-			return frames
+		# Normalize in place (the slice is a view of frames)
+		_apply_scale_and_bias(sliceFrames,self.__scale,self.__bias,self.__casts)
+		return frames
 
 class FrameSlideCMVNormalizer(CMVNormalizer):
 	'''
@@ -1285,6 +1576,8 @@ class FrameSlideCMVNormalizer(CMVNormalizer):
 		self.__width = width
 		self.__std = std
 		self.__dim = None
+		# <std> is fixed, so choose once how frames are turned into the cached statistics
+		self.__frame_values = self.__mean_std_values if std else self.__mean_values
 
 		self.__freezedCmvn = None
 		self.__globalCMV = None
@@ -1293,7 +1586,7 @@ class FrameSlideCMVNormalizer(CMVNormalizer):
 		if freezedCmvn is not None:
 			assert isinstance(freezedCmvn,np.ndarray) and len(freezedCmvn) == 2, \
 						 "<freezedCMVN> should be a 2-d NumPy array."
-			self.__freezedCmvn = freezedCmvn
+			self.set_freezed_cmvn(freezedCmvn)
 			self.__dim = freezedCmvn.shape[1]
 
 		# If has global CMVN
@@ -1337,16 +1630,23 @@ class FrameSlideCMVNormalizer(CMVNormalizer):
 	def freeze(self):
 		'''Freeze the CMVN statistics.'''
 		if self.__freezedCmvn is None:
-			self.__freezedCmvn = self.get_cmvn()
+			self.set_freezed_cmvn( self.get_cmvn() )
 
-	def apply(self,frames):
-		'''Apply the cmvn to frames.'''
+	def apply(self,frames,inPlace=False):
+		'''
+		Apply the cmvn to frames.
+
+		Args:
+			_frames_: (2-d array) The feature.
+			_inPlace_: (bool) If True and _frames_ is a float array, normalize it directly. Otherwise, a new float array is returned.
+		'''
 		assert isinstance(frames,np.ndarray)
 		if len(frames) == 0:
 			return frames
 
 		assert len(frames.shape) == 2
 		fdim = frames.shape[1]
+		frames = _owned_float_frames(frames,inPlace)
 
 		if self.offset == -1:
 			# Check the feature dimmension
@@ -1354,7 +1654,7 @@ class FrameSlideCMVNormalizer(CMVNormalizer):
 				assert fdim == self.dim
 			# If has freezed cmvn
 			if self.__freezedCmvn is not None:
-				return ((frames-self.__freezedCmvn[0])/self.__freezedCmvn[1]) if self.__std else (frames-self.__freezedCmvn[0])
+				return _apply_scale_and_bias(frames,self.__freezedScale,self.__freezedBias,self.__freezedCasts)
 			else:
 				return self.__apply(frames)
 
@@ -1367,9 +1667,8 @@ class FrameSlideCMVNormalizer(CMVNormalizer):
 				self.__dim = fdim - self.offset
 				endIndex = fdim
 			# Compute
-			sliceFrames = frames[ :, self.offset:endIndex ]
-			result = self.__apply(sliceFrames)
-			frames[ :, self.offset:endIndex ] = result
+			# The slice is a view of frames and it is normalized in place, so no copy-back is needed
+			self.__apply( frames[ :, self.offset:endIndex ] )
 			return frames
 
 	@property
@@ -1381,47 +1680,95 @@ class FrameSlideCMVNormalizer(CMVNormalizer):
 		return self.__width
 
 	def __apply(self,frames):
-		for ID in range(len(frames)):
-			self.cache_frame(frames[ID])
-			cmvn = self.get_cmvn()
-			if self.__std:
-				frames[ID] = (frames[ID]- cmvn[0])/cmvn[1]
-			else:
-				frames[ID] = (frames[ID]- cmvn[0])
+		'''
+		Cache a chunk of frames and normalize each of them with the sliding statistics.
+		This is equivalent to calling .cache_frame and .get_cmvn frame by frame.
+		'''
+		if self.__frameBuffer is None:
+			self.__dim = frames.shape[1]
+			rows = 2 if self.__std else 1
+			self.__frameBuffer = np.zeros([rows,self.__width,self.__dim],dtype="float32")
+			self.__cmv = np.zeros([rows,self.__dim],dtype="float32")
+			self.__counter = 0
+			self.__ringIndex = 0
+
+		N = len(frames)
+		width = self.__width
+		values = self.__frame_values(frames)
+		# The cached frames which leave the window when each new frame comes in
+		if N <= width:
+			leaving = self.__oldest_frames(N)
+		else:
+			leaving = np.concatenate([self.__oldest_frames(width),values[:,0:N-width]],axis=1)
+		# The statistics after each frame has been cached
+		cmvs = self.__cmv[:,None,:] + np.cumsum(values - leaving,axis=1)
+		self.__cmv[:] = cmvs[:,-1]
+		# Write the new frames (at most a window of them) into the ring buffer with at most two slices
+		keep = min(N,width)
+		start = (self.__ringIndex + N - keep) % width
+		first = min(keep,width - start)
+		self.__frameBuffer[:,start:start+first] = values[:,N-keep:N-keep+first]
+		self.__frameBuffer[:,0:keep-first] = values[:,N-keep+first:N]
+		counts = self.__counter + np.arange(1,N+1)
+		self.__ringIndex = (self.__ringIndex + N) % width
+		self.__counter += N
+
+		# Compute the cmvn of each frame
+		if counts[0] >= width:
+			# The window has been full, so every frame is normalized by the window statistics
+			cmvn = np.multiply(cmvs, 1.0/width, out=cmvs)
+		elif self.__globalCMV is None:
+			cmvn = cmvs / np.minimum(counts,self.__width)[:,None]
+		else:
+			missed = np.maximum(self.__width - counts, 0)
+			borrow = self.__globalCounter >= missed
+			weights = np.where(borrow, missed/self.__globalCounter, 1)
+			denominators = np.where(borrow, self.__width, counts + self.__globalCounter)
+			cmvn = (cmvs + self.__globalCMV[0:len(values),None,:] * weights[:,None]) / denominators[:,None]
+
+		np.subtract(frames, cmvn[0], out=frames)
+		if self.__std:
+			np.divide(frames, cmvn[1], out=frames)
 		return frames
 
+	def __oldest_frames(self,n):
+		'''
+		Get the n oldest cached frames in order.
+		They are at most two contiguous slices of the ring buffer, so no modulo indexing is needed.
+		'''
+		start = self.__ringIndex
+		first = min(n,self.__width - start)
+		if first == n:
+			return self.__frameBuffer[:,start:start+n]
+		else:
+			return np.concatenate([self.__frameBuffer[:,start:],self.__frameBuffer[:,0:n-first]],axis=1)
+
+	@staticmethod
+	def __mean_values(frames):
+		return frames[None]
+
+	@staticmethod
+	def __mean_std_values(frames):
+		return np.stack([frames, frames**2])
+
 	def cache_frame(self,frame):
 		'''Cache frame'''
+		values = self.__frame_values(frame)
 		if self.__frameBuffer is None:
 			dim = len(frame)
-			if self.__std:
-				self.__frameBuffer = np.zeros([2,self.__width,dim],dtype="float32")
-				self.__cmv = np.zeros([2,dim],dtype="float32")
-
-				frame2 = frame ** 2
-
-				self.__frameBuffer[0,0,:] = frame
-				self.__frameBuffer[1,0,:] = frame
-				self.__cmv[0,:] = frame
-				self.__cmv[1,:] = frame2
-
-			else:
-				self.__frameBuffer = np.zeros([1,self.__width,dim],dtype="float32")
-				self.__cmv = np.zeros([1,dim],dtype="float32")
+			self.__frameBuffer = np.zeros([len(values),self.__width,dim],dtype="float32")
+			self.__cmv = np.zeros([len(values),dim],dtype="float32")
 
-				self.__frameBuffer[0,0,:] = frame
-				self.__cmv[0,:] = frame
+			self.__frameBuffer[:,0,:] = values
+			self.__cmv[:] = values
 			
 			self.__counter = 1
-			self.__ringIndex = 1
+			self.__ringIndex = 1 % self.__width
 			self.__dim = dim
 		else:
-			self.__cmv[0] = self.__cmv[0] - self.__frameBuffer[0,self.__ringIndex,:] + frame
-			self.__frameBuffer[0,self.__ringIndex,:] = frame
-			if self.__std:
-				frame2 = frame ** 2
-				self.__cmv[1] = self.__cmv[1] - self.__frameBuffer[1,self.__ringIndex,:] + frame2
-				self.__frameBuffer[1,self.__ringIndex,:] = frame2
+			self.__cmv -= self.__frameBuffer[:,self.__ringIndex,:]
+			self.__cmv += values
+			self.__frameBuffer[:,self.__ringIndex,:] = values
 
 			self.__ringIndex = (self.__ringIndex + 1)%self.__width
 			self.__counter += 1
@@ -1448,6 +1795,15 @@ class FrameSlideCMVNormalizer(CMVNormalizer):
 	def set_freezed_cmvn(self,cmvn):
 		assert isinstance(cmvn,np.ndarray) and len(cmvn.shape) == 2
 		self.__freezedCmvn = cmvn
+		# Precompute the scale and bias in float64, so the normalization is one multiplication and one addition
+		cmvn = cmvn.astype("float64")
+		if self.__std:
+			self.__freezedScale = 1.0 / cmvn[1]
+			self.__freezedBias = - cmvn[0] * self.__freezedScale
+		else:
+			self.__freezedScale = None
+			self.__freezedBias = - cmvn[0]
+		self.__freezedCasts = {}
 
 	def get_stats(self):
 		'''Write the statistics into file.'''
@@ -1467,7 +1823,7 @@ class MatrixFeatureProcessor(Component):
 	The feature processor.
 	'''
 	def __init__(self,delta=0,deltaWindow=2,spliceLeft=0,spliceRight=0,
-										cmvNormalizer=None,lda=None,oKey="data",name=None):
+										cmvNormalizer=None,lda=None,quantize=None,quantScale=32.0,oKey="data",name=None):
 		'''
 		Args:
 			_delta_: (int) The order of delta.
@@ -1476,6 +1832,8 @@ class MatrixFeatureProcessor(Component):
 			_spliceRight_: (int) Right context to splice.
 			_cmvNormalizer_: (CMVNormalizer).
 			_lda_: (str, 2-d array) LDA file path or 2-d np.ndarray.
+			_quantize_: (None or str) None, "float16" or "int8". Quantize the output feature to reduce the bytes passed downstream.
+			_quantScale_: (float or 1-d array) The int8 value is round(feature * quantScale), clipped to [-127,127].
 			_name_: (str) Name.
 		'''
 		super().__init__(oKey=oKey,name=name)
@@ -1483,6 +1841,12 @@ class MatrixFeatureProcessor(Component):
 		assert isinstance(deltaWindow,int) and deltaWindow > 0
 		assert isinstance(spliceLeft,int) and spliceLeft >= 0
 		assert isinstance(spliceRight,int) and spliceRight >= 0
+		assert quantize in [None,"float16","int8"], f"{self.name}: <quantize> should be None, 'float16' or 'int8'."
+		if quantize == "int8":
+			quantScale = np.asarray(quantScale,dtype="float32")
+			assert len(quantScale.shape) <= 1 and np.all(quantScale > 0)
+		self.__quantize = quantize
+		self.__quantScale = quantScale
 
 		self.__delta = delta
 		self.__deltaWindow = deltaWindow
@@ -1491,12 +1855,21 @@ class MatrixFeatureProcessor(Component):
 		# Config LDA
 		if lda is not None:
 			if isinstance(lda,str):
-				self.__ldaMat = load_lda_matrix(lda)
+				lda = load_lda_matrix(lda)
 			else:
 				assert isinstance(lda,np.ndarray) and len(lda.shape) == 2
-				self.__ldaMat = lda
+			# The loaded matrix is a transposed (Fortran ordered) view.
+			# Keep a C ordered float32 copy, so the float32 features are projected by a single SGEMM call.
+			self.__ldaMat = np.ascontiguousarray(lda,dtype="float32")
 		else:
 			self.__ldaMat = None
+		# The output buffer of delta. It will be allocated at the first step.
+		self.__deltaOut = None
+		# The output and scratch buffers of LDA transform. They will be allocated at the first step.
+		self.__ldaOut = None
+		# The gather index and output buffer of splicing. They will be built at the first step.
+		self.__spliceIndex = None
+		self.__spliceOut = None
 		# Config CMVNs
 		self.__cmvns = []
 		if cmvNormalizer is not None:
@@ -1510,12 +1883,55 @@ class MatrixFeatureProcessor(Component):
 			assert isinstance(index,int) and 0 <= index < len(self.__cmvns)
 			self.__cmvns[index] = cmvn
 
+	def __splice(self,feats):
+		'''
+		Splice the frames which have full context with a prebuilt gather index.
+		This is the same as splice_feats(feats,left,right,padding=False).
+		'''
+		rows, dims = feats.shape
+		width = self.__context.left + self.__context.right + 1
+		# The index only changes when the chunk size changes
+		if self.__spliceIndex is None or self.__spliceIndex.shape != (rows-width+1,width*dims) or self.__spliceOut.dtype != feats.dtype:
+			self.__spliceIndex = np.add.outer(np.arange(rows-width+1)*dims, np.arange(width*dims))
+			self.__spliceOut = np.empty(self.__spliceIndex.shape,dtype=feats.dtype)
+		return np.take(np.ascontiguousarray(feats).reshape(-1), self.__spliceIndex, out=self.__spliceOut)
+
+	def __get_lda_buffer(self,rows,dtype):
+		'''
+		Get the reused output buffer and the scratch buffer of LDA transform with at least _rows_ rows.
+		'''
+		dtype = np.result_type(dtype,self.__ldaMat.dtype)
+		if self.__ldaOut is None or len(self.__ldaOut[0]) < rows or self.__ldaOut[0].dtype != dtype:
+			self.__ldaOut = np.empty([2,rows,self.__ldaMat.shape[1]],dtype=dtype)
+		return self.__ldaOut[0,:rows], self.__ldaOut[1,:rows]
+
+	def __splice_lda(self,feats):
+		'''
+		Splice and project the frames which have full context at once.
+		The LDA matrix is split into one block for each context offset,
+		so the output is the sum of the shifted frames projected by their blocks.
+		This is the same as np.dot(self.__splice(feats), self.__ldaMat).
+		'''
+		rows, dims = feats.shape
+		width = self.__context.left + self.__context.right + 1
+		assert self.__ldaMat.shape[0] == width*dims, f"{self.name}: LDA matrix dim does not match the spliced feature dim, {self.__ldaMat.shape[0]} != {width*dims}."
+		blocks = self.__ldaMat.reshape([width,dims,-1])
+		feats = np.ascontiguousarray(feats)
+		centers = rows - width + 1
+		out, temp = self.__get_lda_buffer(centers,feats.dtype)
+		np.dot(feats[0:centers],blocks[0],out=out)
+		for k in range(1,width):
+			np.dot(feats[k:k+centers],blocks[k],out=temp)
+			out += temp
+		return out
+
 	def __transform_function(self,feats):
 		## do the cmvn firstly.
 		## We will save the new cmvn feature instead of raw feature buffer.
 		if len(self.__cmvns) > 0:
-			for cmvn in self.__cmvns:
-				feats = cmvn.apply( feats )
+			for i, cmvn in enumerate(self.__cmvns):
+				# The input belongs to the packet, so only the outputs of the former CMVNs are normalized in place
+				feats = cmvn.apply( feats, inPlace=(i > 0) )
 
 		## then compute context 
 		#print( "debug 1:", feats.shape )
@@ -1526,17 +1942,45 @@ class MatrixFeatureProcessor(Component):
 
 		# Add delta
 		if self.__delta > 0: 
-			feats = add_deltas(feats,order=self.__delta,window=self.__deltaWindow)
+			rows, dims = feats.shape
+			shape = (rows,dims*(self.__delta+1))
+			if self.__deltaOut is None or self.__deltaOut.shape != shape:
+				self.__deltaOut = np.empty(shape,dtype="float32")
+			feats = add_deltas(feats,order=self.__delta,window=self.__deltaWindow,out=self.__deltaOut)
 		# Splice
-		if self.__context.left > 0 or self.__context.right != 0: 
-			feats = splice_feats(feats,left=self.__context.left,right=self.__context.right)
+		# Only the center frames are spliced, since their context is always in the wrapped batch.
+		# So the context frames are neither spliced nor projected just to be stripped later.
+		hasContext = self.__context.left > 0 or self.__context.right != 0
+		if hasContext and self.__ldaMat is not None:
+			# Splicing is only a re-indexing, so project the context frames without building the spliced matrix
+			feats = self.__splice_lda(feats)
+		elif hasContext: 
+			feats = self.__splice(feats)
+		else:
+			feats = self.__context.strip( feats )
 		# Use LDA transform
-		if self.__ldaMat is not None: 
-			feats = feats.dot(self.__ldaMat)
+		# The result is written into a reused buffer, Packet.add will copy it.
+		if self.__ldaMat is not None and not hasContext: 
+			rows = len(feats)
+			feats = np.dot(feats,self.__ldaMat,out=self.__get_lda_buffer(rows,feats.dtype)[0])
+		# Quantize
+		if self.__quantize is not None:
+			feats = self.__quantize_feats(feats)
 
-		feats = self.__context.strip( feats )
 		return feats
 
+	def __quantize_feats(self,feats):
+		'''
+		Quantize the feature to float16 or int8.
+		'''
+		if self.__quantize == "float16":
+			return feats.astype("float16")
+		else:
+			temp = feats * self.__quantScale
+			np.rint(temp,out=temp)
+			np.clip(temp,-127,127,out=temp)
+			return temp.astype("int8")
+
 	def core_loop(self):
 
 		lastPacket = None
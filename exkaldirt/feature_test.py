@@ -192,6 +192,37 @@ def test_processor_cmvn():
 
 #test_processor_cmvn()
 
+def test_processor_quantize():
+
+  wavData = stream.read(wavPath).value
+  frames = stream.cut_frames(wavData)
+
+  pipe = base.PIPE() 
+
+  for i in range(10):
+    pipe.put( base.Packet( {"rawWave":frames[i*50:(i+1)*50]}, cid=i, idmaker=0 ) )
+
+  pipe.stop()
+
+  extractor = feature.MfccExtractor(minParallelSize=100,oKey="mfcc")
+  # The output feature is quantized: int8 value = round(feature * quantScale)
+  processor = feature.MatrixFeatureProcessor(
+                                    cmvNormalizer=feature.FrameSlideCMVNormalizer(std=True),
+                                    quantize="int8",
+                                    quantScale=32.0,
+                                    oKey="mfcc",
+                                  )
+
+  extractor.start(inPIPE=pipe)
+  processor.start(inPIPE=extractor.outPIPE,iKey="mfcc")
+  processor.wait()
+
+  packet = processor.outPIPE.get()
+  print( packet["mfcc"].dtype ) # int8
+  print( packet["mfcc"] / 32.0 )
+
+#test_processor_quantize()
+
 ####################
 # There are two ways to extract and process mixture feature.
 # The fisrt one, is contruct 
@@ -17,6 +17,7 @@
 
 import os
 import math
+import queue
 import pyaudio
 import wave
 import time
@@ -62,30 +63,50 @@ def record(seconds=0,fileName=None):
   totCount = int(seconds*rate)
   if totCount != 0 and totCount < perCount:
     raise Exception("Recording time is extremely short!")
-  recordTimes = int(totCount/perCount)
+
+  # If the time is limited, write the stream into a preallocated array directly
+  if seconds == 0:
+    result = []
+  else:
+    content = np.empty([totCount,],dtype=npFormat)
+  points = 0
+
+  def capture(inData,frameCount,timeInfo,status):
+    '''
+    Called by PortAudio in its own thread for each buffer,
+    so a slow main thread does not make the input overflow.
+    '''
+    nonlocal points
+    if seconds == 0:
+      result.append(inData)
+      return (None,pyaudio.paContinue)
+    samples = np.frombuffer(inData,dtype=npFormat)
+    count = min(len(samples),totCount-points)
+    content[points:points+count] = samples[:count]
+    points += count
+    return (None,pyaudio.paComplete if points >= totCount else pyaudio.paContinue)
 
   pa = pyaudio.PyAudio()
   stream = pa.open(format=paFormat,channels=channels,rate=rate,
-              input=True,output=False)
-  result = []
+              input=True,output=False,frames_per_buffer=perCount,stream_callback=capture)
   try:
-    if seconds == 0:
-      print("Start recording...")
-      while True:
-        result.append(stream.read(perCount))
-    else:
-      print("Start recording...")
-      for i in range(recordTimes):
-        result.append(stream.read(perCount))
-      if (i + 1) * perCount < totCount:
-        result.append(stream.read( (totCount-(i+1)*perCount) ) )
+    print("Start recording...")
+    while stream.is_active():
+      time.sleep(info.TIMESCALE)
   except KeyboardInterrupt:
     pass
+  finally:
+    stream.stop_stream()
+    stream.close()
+    pa.terminate()
   print("Stop Recording!")
 
+  if seconds == 0:
+    content = np.frombuffer(b"".join(result),dtype=npFormat)
+  else:
+    content = content[:points]
+
   if fileName is None:
-    content = [ np.frombuffer(i,dtype=npFormat) for i in result ]
-    content = np.concatenate(content,axis=0)
     points = len(content)
     duration = round(points/rate,2)
     return namedtuple("Wave",["rate","channels","points","duration","value"])(
@@ -99,7 +120,7 @@ def record(seconds=0,fileName=None):
       wf.setnchannels(channels) 
       wf.setsampwidth(width) 
       wf.setframerate(rate) 
-      wf.writeframes( b"".join(result) ) 
+      wf.writeframes( content.tobytes() ) 
     return fileName
 
 def read(waveFile):
@@ -383,9 +404,18 @@ class StreamReader(Component):
     '''
     readTimes = math.ceil(self.__totalframes/self.__points)
     wf = wave.open(self.__recource, "rb")
+    # Bind the configs which are used at every chunk
+    points = self.__points
+    chunkBytes = self.__width * self.__points
+    dtype = self.__format
+    vad = self.__vad
+    oKey = self.oKey[0]
+    objid = self.objid
 
     try:
       i = 0
+      # The time when the next chunk is due. Chunks are scheduled on a fixed clock, so a late chunk does not delay the later ones
+      nextTime = time.monotonic()
       while i < readTimes:
         # Decide state
         master, state = self.decide_state()
@@ -397,25 +427,29 @@ class StreamReader(Component):
           time.sleep( info.TIMESCALE )
           if self.__redirect_flag:
             break
+          # restart the clock after pausing
+          nextTime = time.monotonic()
           continue
         #
         #print( "try to read stream" )
-        st = time.time()
         # read a chunk of stream
-        data = wf.readframes(self.__points)
+        data = wf.readframes(points)
         # detcet if necessary
-        if self.__vad is not None:
-          if len(data) != self.__width*self.__points:
-            data += np.zeros( (self.__width*self.__points-len(data))//2, dtype="int16" ).tobytes() 
-          valid = self.__vad.detect(data)
+        if vad is not None:
+          if len(data) != chunkBytes:
+            data += bytes( chunkBytes-len(data) )
+          valid = vad.detect(data)
         else:
           valid = True
         # add data
         if valid is True:
-          ## append data
-          for ele in np.frombuffer(data,dtype=self.__format):
-            if self.outPIPE.state_is_(mark.silent,mark.active):
-              self.put_packet( Packet( items={self.oKey[0]:ele},cid=self.__id_count,idmaker=self.objid ) )
+          ## append data of this chunk with one PIPE call
+          if self.outPIPE.state_is_(mark.silent,mark.active):
+            samples = np.frombuffer(data,dtype=dtype)
+            cid = self.__id_counter
+            self.__id_counter += len(samples)
+            self.put_packets( [ Packet( items={oKey:ele},cid=cid+j,idmaker=objid ) 
+                                for j,ele in enumerate(samples) ] )
         elif valid is None:
           self.put_packet( Endpoint( cid=self.__id_count,idmaker=self.objid ) )
         ## if reader has been stopped by force
@@ -424,7 +458,8 @@ class StreamReader(Component):
         #print( "sleep" )
         # wait if necessary
         if self.__simulate:
-          internal = self.__timeSpan - round( (time.time()-st),4)
+          nextTime += self.__timeSpan
+          internal = nextTime - time.monotonic()
           if internal > 0:
             time.sleep( internal )
         
@@ -509,9 +544,22 @@ class StreamRecorder(Component):
     '''
     The thread function to record stream from microphone.
     '''
+    # PortAudio captures each chunk in its own thread and hands it over with a queue,
+    # so the input does not overflow when this loop is slow to put packets
+    chunks = queue.Queue()
+    def capture(inData,frameCount,timeInfo,status):
+      chunks.put(inData)
+      return (None,pyaudio.paContinue)
+
     pa = pyaudio.PyAudio()
     stream = pa.open(format=self.__paFormat,channels=self.__channels,
-                     rate=self.__rate,input=True,output=False)
+                     rate=self.__rate,input=True,output=False,
+                     frames_per_buffer=self.__points,stream_callback=capture)
+    # Bind the configs which are used at every chunk
+    dtype = self.__format
+    vad = self.__vad
+    oKey = self.oKey[0]
+    objid = self.objid
     try:
       while True:
         # 
@@ -523,20 +571,29 @@ class StreamRecorder(Component):
           time.sleep( info.TIMESCALE )
           if self.__redirect_flag:
             break
+          # discard the audio captured while pausing
+          with chunks.mutex:
+            chunks.queue.clear()
           continue
         
-        data = stream.read(self.__points)
+        try:
+          data = chunks.get(timeout=info.TIMESCALE)
+        except queue.Empty:
+          continue
         # detcet if necessary
-        if self.__vad is not None:
-          valid = self.__vad.detect(data)
+        if vad is not None:
+          valid = vad.detect(data)
         else:
           valid = True
         # add data
         if valid is True:
-          ## append data
-          for ele in np.frombuffer(data,dtype=self.__format):
-            if self.outPIPE.state_is_(mark.silent,mark.active):
-              self.put_packet( Packet( items={self.oKey[0]:ele},cid=self.__id_count,idmaker=self.objid ) )
+          ## append data of this chunk with one PIPE call
+          if self.outPIPE.state_is_(mark.silent,mark.active):
+            samples = np.frombuffer(data,dtype=dtype)
+            cid = self.__id_counter
+            self.__id_counter += len(samples)
+            self.put_packets( [ Packet( items={oKey:ele},cid=cid+j,idmaker=objid ) 
+                                for j,ele in enumerate(samples) ] )
         elif valid is None:
           self.put_packet( Endpoint( cid=self.__id_count,idmaker=self.objid ) )
 
@@ -605,9 +662,9 @@ class ElementFrameCutter(Component):
       ## If there are new data generated
       if self.__hadData:
         if self.__batchSize == 1:
-          self.put_packet( Packet( items={self.oKey[0]:self.__streamBuffer[0].copy()}, cid=self.__id_count, idmaker=self.objid ) )
+          self.put_packet( Packet( items={self.oKey[0]:self.__streamBuffer[0]}, cid=self.__id_count, idmaker=self.objid ) )
         else:
-          self.put_packet( Packet( items={self.oKey[0]:self.__streamBuffer.copy()}, cid=self.__id_count, idmaker=self.objid ) )
+          self.put_packet( Packet( items={self.oKey[0]:self.__streamBuffer}, cid=self.__id_count, idmaker=self.objid ) )
       ## check whether arrived endpoint
       if self.__endpointStep:
         self.put_packet( Endpoint( cid=self.__id_count,idmaker=self.objid ) )
@@ -647,17 +704,22 @@ class ElementFrameCutter(Component):
         action = self.decide_action()
         # 
         if action is True:
-          pack = self.get_packet()
-          if not pack.is_empty():
-            iKey = pack.mainKey if self.iKey is None else self.iKey
-            ele = pack[ iKey ]
-            assert isinstance(ele, (np.signedinteger,np.floating))
+          # take the samples of the rest of this frame (until an endpoint) at once
+          packs = self.get_packets( self.__width - pos )
+          eles = []
+          for pack in packs:
+            if not pack.is_empty():
+              iKey = pack.mainKey if self.iKey is None else self.iKey
+              ele = pack[ iKey ]
+              assert isinstance(ele, (np.signedinteger,np.floating))
+              eles.append( ele )
+          if len(eles) > 0:
             if self.__streamBuffer is None:
-              self.__streamBuffer = np.zeros([self.__batchSize,self.__width,], dtype=ele.dtype)
-            self.__streamBuffer[i,pos] = ele
+              self.__streamBuffer = np.zeros([self.__batchSize,self.__width,], dtype=eles[0].dtype)
+            self.__streamBuffer[i,pos:pos+len(eles)] = eles
             self.__hadData = True
-            pos += 1
-          if is_endpoint(pack):    
+            pos += len(eles)
+          if len(packs) > 0 and is_endpoint(packs[-1]):    
             self.__endpointStep = True
             break
         elif action is None:
@@ -666,8 +728,8 @@ class ElementFrameCutter(Component):
         else:
           return False
 
-      # Padding the rest
-      if self.__streamBuffer is not None:
+      # Padding the rest (only a short frame at an endpoint or the end has the rest)
+      if self.__streamBuffer is not None and pos < self.__width:
         self.__streamBuffer[i,pos:] = 0
       
       if self.__endpointStep or self.__finalStep:
@@ -699,15 +761,17 @@ class FrameDissolver(Component):
           iKey = self.iKey if self.iKey is not None else packet.mainKey
           data = packet[iKey]
           assert isinstance(data,np.ndarray), f"{self.name}: Can only dissolve vector and matrix packet but got: {type(data)}."
-          for element in data.reshape(-1):
-            self.put_packet( Packet( {self.oKey[0]:element},cid=self.__id_count,idmaker=packet.idmaker ) )
+          self.put_packets( [ Packet( {self.oKey[0]:element},cid=self.__id_count,idmaker=packet.idmaker ) for element in data.reshape(-1) ] )
         if is_endpoint(packet):
           self.put_packet( Endpoint(cid=self.__id_count,idmaker=packet.idmaker) )
       else:
         break
 
 class VectorBatcher(Component):
-
+  '''
+  Batch frames with left and right context.
+  The input packet can be a vector (one frame) or a matrix (a batch of frames).
+  '''
   def __init__(self,center,left=0,right=0,oKey="data",name=None):
     super().__init__(oKey=oKey,name=name)
     assert isinstance(center,int) and center > 0
@@ -737,6 +801,9 @@ class VectorBatcher(Component):
     self.__reset_position_flag()
     # Prepare a work buffer (It might be avaliable only in this process)
     self.__streamBuffer = None #np.zeros([self.__width,],dtype="int16")
+    # The received frames which have not been batched
+    self.__pendingRows = []
+    self.__pendingEndpoint = False
 
     while True:
       # prepare a frame of stream
@@ -744,7 +811,7 @@ class VectorBatcher(Component):
         break
       ## If there are new data generated
       if self.__hadData:
-        self.put_packet( Packet( items={self.oKey[0]:self.__streamBuffer.copy()}, cid=self.__id_count, idmaker=self.objid ) )
+        self.put_packet( Packet( items={self.oKey[0]:self.__streamBuffer}, cid=self.__id_count, idmaker=self.objid ) )
       ## check whether arrived endpoint
       if self.__endpointStep:
         self.put_packet( Endpoint( cid=self.__id_count,idmaker=self.objid ) )
@@ -781,31 +848,46 @@ class VectorBatcher(Component):
 
     # get new data
     while pos < self.__width:
+      # Use the rows which have been received but not batched firstly
+      if len(self.__pendingRows) > 0:
+        rows = self.__pendingRows[0]
+        if self.__streamBuffer is None:
+          self.__streamBuffer = np.zeros([self.__width,rows.shape[1],], dtype=rows.dtype)
+        size = min(len(rows), self.__width - pos)
+        self.__streamBuffer[pos:pos+size] = rows[:size]
+        self.__hadData = True
+        pos += size
+        if size < len(rows):
+          self.__pendingRows[0] = rows[size:]
+        else:
+          self.__pendingRows.pop(0)
+        continue
+      elif self.__pendingEndpoint:
+        self.__pendingEndpoint = False
+        self.__endpointStep = True
+        break
       # Decide state
       action = self.decide_action()
       if action is True:
-        pack = self.get_packet()
-        if not pack.is_empty():
-          iKey = pack.mainKey if self.iKey is None else self.iKey
-          vec = pack[ iKey ]
-          assert isinstance(vec, np.ndarray) and len(vec.shape) == 1
-          if self.__streamBuffer is None:
-            dim = len(vec)
-            self.__streamBuffer = np.zeros([self.__width,dim,], dtype=vec.dtype)
-          self.__streamBuffer[pos] = vec
-          self.__hadData = True
-          pos += 1
-        if is_endpoint(pack):
-          self.__endpointStep = True
-          break
+        # take all avaliable packets (until an endpoint) at once
+        # A packet can carry a vector (one frame) or a matrix (a batch of frames)
+        packs = self.get_packets( self.__width - pos )
+        for pack in packs:
+          if not pack.is_empty():
+            iKey = pack.mainKey if self.iKey is None else self.iKey
+            data = pack[ iKey ]
+            assert isinstance(data, np.ndarray) and len(data.shape) in [1,2]
+            self.__pendingRows.append( data[None,:] if len(data.shape) == 1 else data )
+        if len(packs) > 0 and is_endpoint(packs[-1]):
+          self.__pendingEndpoint = True
       elif action is False:
         return False
       else:
         self.__finalStep = True
         break
 
-    # Padding the rest
-    if self.__streamBuffer is not None:
+    # Padding the rest (only a short batch at an endpoint or the end has the rest)
+    if self.__streamBuffer is not None and pos < self.__width:
       self.__streamBuffer[pos:] = 0
 
     return True   
@@ -840,9 +922,8 @@ class MatrixSubsetter(Component):
           assert isinstance(mat,np.ndarray) and len(mat.shape) == 2
           cSize = len(mat) // self.__nChunk
           assert cSize * self.__nChunk == len(mat)
-          # Split matrix
-          for i in range(self.__nChunk):
-            self.put_packet( Packet(items={self.oKey[0]:mat[i*cSize:(i+1)*cSize]}, cid=self.__id_count, idmaker=pack.idmaker) )
+          # Split matrix and append all chunks into PIPE at once
+          self.put_packets( [ Packet(items={self.oKey[0]:mat[i*cSize:(i+1)*cSize]}, cid=self.__id_count, idmaker=pack.idmaker) for i in range(self.__nChunk) ] )
         # add endpoint
         if is_endpoint(pack):
           self.put_packet( Endpoint(cid=self.__id_count, idmaker=pack.idmaker) )
@@ -908,31 +989,30 @@ class VectorVADetector(Component):
       # prepare a chunk of frames
       if not self.__prepare_chunk_frame():
         break
-      self.__workBuffer.flags.writeable = False
       # Detect if necessary
       # activity can be a bool value or a list of bool value
       if self.__tailIndex > 0:
         activity = self.vad_function( self.__workBuffer[:self.__tailIndex] )
       else:
         activity = True
-      self.__workBuffer.flags.writeable = True
       # print(activity)
-      # append data into pipe and do some processes
-
+      # collect output packets of this chunk and append them into pipe at once
+      # (Packet copies each row into its own array, so the rows of work buffer can be given directly)
+      packets = []
       if isinstance(activity,(bool,int)):
         ### If activity, add all frames in to new PIPE
         if activity:
           for i in range(self.__tailIndex):
-            self.put_packet( Packet({self.oKey[0]:self.__workBuffer[i].copy()},cid=self.__id_count,idmaker=self.objid) )
+            packets.append( Packet({self.oKey[0]:self.__workBuffer[i]},cid=self.__id_count,idmaker=self.objid) )
           self.__silenceCounter = 0
         ### If not
         else:
           self.__silenceCounter += 1
           if self.__silenceCounter < self.__patience:
             for i in range(self.__tailIndex):
-              self.put_packet( Packet({self.oKey[0]:self.__workBuffer[i].copy()},cid=self.__id_count,idmaker=self.objid) )
+              packets.append( Packet({self.oKey[0]:self.__workBuffer[i]},cid=self.__id_count,idmaker=self.objid) )
           elif (self.__silenceCounter == self.__patience) and self.__truncate:
-            self.put_packet( Endpoint(cid=self.__id_count,idmaker=self.objid) )
+            packets.append( Endpoint(cid=self.__id_count,idmaker=self.objid) )
           else:
             pass
       ## if this is a list or tuple of bool value
@@ -941,20 +1021,21 @@ class VectorVADetector(Component):
                                                   "it must has the same numbers with chunk frames."
         for i, act in enumerate(activity):
           if act:
-            self.put_packet( Packet({self.oKey[0]:self.__workBuffer[i].copy()},cid=self.__id_count,idmaker=self.objid) )
+            packets.append( Packet({self.oKey[0]:self.__workBuffer[i]},cid=self.__id_count,idmaker=self.objid) )
             self.__silenceCounter = 0
           else:
             self.__silenceCounter += 1
             if self.__silenceCounter < self.__patience:
-              self.put_packet( Packet({self.oKey[0]:self.__workBuffer[i].copy()},cid=self.__id_count,idmaker=self.objid) )
+              packets.append( Packet({self.oKey[0]:self.__workBuffer[i]},cid=self.__id_count,idmaker=self.objid) )
             elif (self.__silenceCounter == self.__patience) and self.__truncate:
-              self.put_packet( Endpoint(cid=self.__id_count,idmaker=self.objid) )
+              packets.append( Endpoint(cid=self.__id_count,idmaker=self.objid) )
       else:
         raise Exception(f"{self.name}: VAD function must return a bool value or a list of bool value.")
       # If arrived endpoint
       if self.__endpointStep:
-        self.put_packet( Endpoint(cid=self.__id_count,idmaker=self.objid) )
+        packets.append( Endpoint(cid=self.__id_count,idmaker=self.objid) )
         self.__reset_position_flag()
+      self.put_packets( packets )
       # If over
       if self.__finalStep:
         break
@@ -966,17 +1047,22 @@ class VectorVADetector(Component):
     while pos < self.__batchSize:
       action = self.decide_action()
       if action is True:
-        pack = self.get_packet()
-        if not pack.is_empty():
-          iKey = pack.mainKey if self.iKey is None else self.iKey
-          vec = pack[ iKey ]
-          assert isinstance(vec, np.ndarray) and len(vec.shape) == 1
+        # take all avaliable packets (until an endpoint) at once
+        packs = self.get_packets( self.__batchSize - pos )
+        vecs = []
+        for pack in packs:
+          if not pack.is_empty():
+            iKey = pack.mainKey if self.iKey is None else self.iKey
+            vec = pack[ iKey ]
+            assert isinstance(vec, np.ndarray) and len(vec.shape) == 1
+            vecs.append( vec )
+        if len(vecs) > 0:
           if self.__workBuffer is None:
-            dim = len(vec)
-            self.__workBuffer = np.zeros([self.__batchSize,dim,], dtype=vec.dtype)
-          self.__workBuffer[pos] = vec
-          pos += 1  
-        if is_endpoint(pack):
+            dim = len(vecs[0])
+            self.__workBuffer = np.zeros([self.__batchSize,dim,], dtype=vecs[0].dtype)
+          self.__workBuffer[pos:pos+len(vecs)] = vecs
+          pos += len(vecs)
+        if len(packs) > 0 and is_endpoint(packs[-1]):
           self.__endpointStep = True
           self.__tailIndex = pos
           break
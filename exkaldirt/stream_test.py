@@ -142,6 +142,37 @@ def batcher_test():
 
 #batcher_test()
 
+def batcher_matrix_test():
+
+  reader = stream.StreamReader(
+          waveFile = wavPath,
+          chunkSize = 480,
+          simulate = False,
+        )
+
+  # The input of batcher can also be a matrix (a batch frames)
+  cutter = stream.ElementFrameCutter(
+          batchSize = 10,
+          width = 400,
+          shift = 160,
+        )
+  
+  batcher = stream.VectorBatcher(
+          center = 50,
+        )
+
+  chain = base.Chain()
+  chain.add( reader )
+  chain.add( cutter )
+  chain.add( batcher )
+
+  chain.start()
+  chain.wait()
+
+  print( chain.outPIPE.size() )
+
+#batcher_matrix_test()
+
 ####################
 # exkaldirt.stream.MatrixSubsetter
 # is used to split a matrix into N chunks
@@ -60,6 +60,8 @@ class SendProtocol(ExKaldiRTBase):
     super().__init__(name=name)
     # Open a client
     self.__client = socket.socket(socket.AF_INET,socket.SOCK_STREAM)
+    # Send each message at once. Every message waits for a response, so Nagle's algorithm would only delay it.
+    self.__client.setsockopt(socket.IPPROTO_TCP,socket.TCP_NODELAY,1)
     # Connect to remote host.
     self.__connect_to(thost,tport)
     #
@@ -147,6 +149,7 @@ class ReceiveProtocol(ExKaldiRTBase):
     print(f"{self.name}: Host address is ({bhost},{bport}). Listening ...")
     self.__server.listen(1)
     self.__client, self.__raddr = self.__server.accept()
+    self.__client.setsockopt(socket.IPPROTO_TCP,socket.TCP_NODELAY,1)
     print(f"{self.name}: Connected! Remote address is ({self.__raddr[0]}, {self.__raddr[1]}).")
 
   def get_host_addr(self):
@@ -163,8 +166,8 @@ class ReceiveProtocol(ExKaldiRTBase):
 
     while True:
       # 1 verify byte size
-      bsize1 = self.__client.recv(4)
-      bsize2 = self.__client.recv(4)
+      bsize1 = self.__recv_exactly(4)
+      bsize2 = self.__recv_exactly(4)
       size1 = uint_from_bytes( bsize1 )
       size2 = uint_from_bytes( bsize2 )
       if size1 != size2:
@@ -174,18 +177,26 @@ class ReceiveProtocol(ExKaldiRTBase):
         ## 2 require sending again
         self.__client.sendall( b"1" )
         continue
-      # 2 verify data
-      buffer = self.__client.recv( size1 )
-      # check
-      if len(buffer) == size1:
-        # Tell the remote host "received successfully"
-        self.__client.sendall( b"0" + uint_to_bytes(len(feedback),length=1) + feedback )
-        return buffer
-      else:
-        ## 1 trye to clear receiving buffer
-        self.__client.recv(info.MAX_SOCKET_BUFFER_SIZE)
-        ## 2 require sending again
-        self.__client.sendall(b"1" )
+      # 2 receive data
+      buffer = self.__recv_exactly( size1 )
+      # Tell the remote host "received successfully"
+      self.__client.sendall( b"0" + uint_to_bytes(len(feedback),length=1) + feedback )
+      return buffer
+
+  def __recv_exactly(self,size):
+    '''
+    Receive exactly <size> bytes.
+    One recv call can return less data than requested when the message is large, so keep reading until it is complete.
+    '''
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+      n = self.__client.recv_into( view[received:], size - received )
+      if n == 0:
+        raise Exception(f"{self.name}: Connection has been closed by remote host.")
+      received += n
+    return buffer
 
   def get_remote_addr(self):
     return self.__raddr
@@ -303,8 +314,10 @@ class PacketSender(Component):
         
         else:
           if self.inPIPE.is_empty():
-            time.sleep( info.TIMESCALE )
-            timecost += info.TIMESCALE
+            # wake up as soon as a new packet is appended
+            st = time.time()
+            self.inPIPE.wait(info.TIMESCALE)
+            timecost += time.time() - st
             if timecost > info.TIMEOUT:
               print(f"{self.name}: Timeout!")
               self.inPIPE.kill()
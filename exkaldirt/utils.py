@@ -45,7 +45,7 @@ def dtype_to_bytes(dtype):
   return  flag + uint_to_bytes(dtype.alignment,length=1)
 
 def dtype_from_bytes(bdtype):
-  flag = bdtype[0:1].decode()
+  flag = bytes(bdtype[0:1]).decode()
   size = uint_from_bytes( bdtype[1:2] )
   if flag == "I":
     dtype = f"int{8*size}"
@@ -95,7 +95,7 @@ def matrix_to_bytes(mat):
   return bdtype + uint_to_bytes(frames,length=4) + mat.tobytes()
 
 def matrix_from_bytes(mat):
-  assert isinstance(mat,bytes)
+  assert isinstance(mat,(bytes,memoryview))
   dtype = dtype_from_bytes( mat[0:2] )
   frames = uint_from_bytes( mat[2:6] )
   data = np.frombuffer( mat[6:], dtype=dtype )